@@ -0,0 +1,321 @@
+# app/broadcast.py
+import os
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from .database import db
+from .metrics import BROADCAST_RECIPIENTS
+from .outbox import is_permanent
+from .utils import deliver_email, mail_configured
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Broadcast settings
+# ------------------------
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "10"))                    # messages/s across all workers
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "200"))          # subscribers read and checkpointed together
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "4"))          # sends in flight
+BROADCAST_LEASE_SECONDS = int(os.getenv("BROADCAST_LEASE_SECONDS", "120"))    # running jobs without a heartbeat for this long are taken over
+BROADCAST_POLL_INTERVAL = float(os.getenv("BROADCAST_POLL_INTERVAL", "15"))
+
+# Job states: queued -> running -> done, with paused (back to queued on resume) and cancelled
+QUEUED, RUNNING, PAUSED, DONE, CANCELLED = "queued", "running", "paused", "done", "cancelled"
+# Recipient states: sending -> sent | failed (transient) | rejected (5xx) ; unknown if a crash hid the outcome
+SENDING, SENT, FAILED, REJECTED, UNKNOWN = "sending", "sent", "failed", "rejected", "unknown"
+OUTCOMES = (SENT, FAILED, REJECTED, UNKNOWN)
+RECIPIENT_STATES = (SENDING, *OUTCOMES)
+
+INDEXES = {
+    "broadcasts": [
+        # at most one running broadcast per deploy, which makes BROADCAST_RATE a global rate
+        IndexModel([("status", 1)], unique=True, partialFilterExpression={"status": RUNNING}, name="one_running"),
+        IndexModel([("created_at", -1)]),
+    ],
+    "broadcast_recipients": [
+        IndexModel([("broadcast_id", 1), ("subscriber_id", 1)], unique=True),
+        IndexModel([("broadcast_id", 1), ("status", 1)]),
+    ],
+}
+
+# everything but the message itself, for listings
+BROADCAST_FIELDS = {"html": 0, "text": 0}
+
+
+async def create_broadcast(subject: str, html_content: str, text_fallback: Optional[str] = None,
+                           rate: Optional[float] = None, created_by: Optional[str] = None) -> Optional[dict]:
+    """
+    Queue a broadcast to everyone subscribed right now; returns None if there are no subscribers.
+    Later subscribers are not included: the job stops at the newest subscriber _id seen here.
+    """
+    latest = await db.newsletters.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    if latest is None:
+        return None
+    until = latest["_id"]
+    job = {
+        "subject": subject,
+        "html": html_content,
+        "text": text_fallback,
+        "rate": min(rate, BROADCAST_RATE) if rate else BROADCAST_RATE,
+        "status": QUEUED,
+        "until": until,
+        "checkpoint": None,
+        "total": await db.newsletters.count_documents({"_id": {"$lte": until}}),
+        **{outcome: 0 for outcome in OUTCOMES},
+        "created_by": created_by,
+        "created_at": datetime.utcnow(),
+    }
+    result = await db.broadcasts.insert_one(job)
+    job["_id"] = result.inserted_id
+    broadcast_runner.wake()
+    return job
+
+async def change_broadcast_status(broadcast_id, from_statuses: tuple, to_status: str) -> Optional[dict]:
+    """
+    Move a job between states (pause, resume, cancel). Returns the updated job, or
+    None if it was not in one of `from_statuses`. A running job notices the change
+    at its next checkpoint, after the batch in flight.
+    """
+    update = {"status": to_status}
+    if to_status == CANCELLED:
+        update["finished_at"] = datetime.utcnow()
+    job = await db.broadcasts.find_one_and_update(
+        {"_id": broadcast_id, "status": {"$in": list(from_statuses)}},
+        {"$set": update},
+        projection=BROADCAST_FIELDS,
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is not None and to_status == QUEUED:
+        broadcast_runner.wake()
+    return job
+
+
+class _Pacer:
+    """Spaces send starts 1/rate seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BroadcastRunner:
+    """
+    Sends queued broadcasts to the newsletter list, one job at a time per deploy.
+
+    Subscribers are read in _id order, BROADCAST_BATCH_SIZE at a time, from the
+    job's checkpoint, so the list is never loaded into memory. Each batch is first
+    recorded in broadcast_recipients (the unique key means a subscriber is sent to
+    at most once), then sent at the job's rate, then checkpointed together with the
+    counts and a heartbeat that renews the lease. A job whose worker died is taken
+    over once the lease runs out and resumes after its checkpoint; recipients that
+    were mid-send at the crash are marked unknown rather than sent twice.
+    """
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._task is not None:
+            return
+        if not mail_configured():
+            logger.warning("Mail credentials not set; broadcast runner not started")
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            # the job keeps its lease and is taken over after BROADCAST_LEASE_SECONDS
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+                if job is not None:
+                    await self._process(job)
+                    continue
+            except Exception:
+                logger.exception("Broadcast runner error")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), BROADCAST_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _lease(self, now: datetime) -> dict:
+        return {
+            "locked_by": self.worker_id,
+            "locked_until": now + timedelta(seconds=BROADCAST_LEASE_SECONDS),
+            "heartbeat_at": now,
+        }
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        # a running job whose worker stopped heartbeating comes first
+        job = await db.broadcasts.find_one_and_update(
+            {"status": RUNNING, "locked_until": {"$lte": now}},
+            {"$set": self._lease(now)},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            if await db.broadcasts.find_one({"status": RUNNING}, {"_id": 1}):
+                return None   # another worker is sending
+            try:
+                job = await db.broadcasts.find_one_and_update(
+                    {"status": QUEUED},
+                    {"$set": {"status": RUNNING, **self._lease(now)}, "$min": {"started_at": now}},
+                    sort=[("created_at", 1)],
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                return None   # another worker started one first (one_running index)
+        if job is not None:
+            await self._settle(job)
+        return job
+
+    async def _settle(self, job: dict):
+        """Close out recipients left mid-send by an earlier run and recount the job from its recipients."""
+        result = await db.broadcast_recipients.update_many(
+            {"broadcast_id": job["_id"], "status": SENDING},
+            {"$set": {"status": UNKNOWN}},
+        )
+        if result.modified_count:
+            logger.warning("Broadcast recipients with unknown outcome",
+                           extra={"broadcast_id": str(job["_id"]), "recipients": result.modified_count})
+        counts = {outcome: 0 for outcome in OUTCOMES}
+        async for row in db.broadcast_recipients.aggregate([
+            {"$match": {"broadcast_id": job["_id"]}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]):
+            if row["_id"] in counts:
+                counts[row["_id"]] = row["count"]
+        await db.broadcasts.update_one({"_id": job["_id"]}, {"$set": counts})
+
+    async def _process(self, job: dict):
+        rate = job.get("rate") or BROADCAST_RATE
+        pacer = _Pacer(rate)
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+        # a batch has to finish well inside the lease, or it would look abandoned
+        batch_size = max(1, min(BROADCAST_BATCH_SIZE, int(rate * BROADCAST_LEASE_SECONDS / 2)))
+        checkpoint = job.get("checkpoint")
+        fields = {"broadcast_id": str(job["_id"]), "subject": job["subject"]}
+        logger.info("Broadcast running", extra={**fields, "resumed": checkpoint is not None})
+
+        while True:
+            if self._stopping:
+                # hand the job back right away instead of waiting out the lease
+                await db.broadcasts.update_one(
+                    {"_id": job["_id"], "locked_by": self.worker_id, "status": RUNNING},
+                    {"$set": {"status": QUEUED}, "$unset": {"locked_by": "", "locked_until": ""}},
+                )
+                return
+
+            query = {"_id": {"$lte": job["until"]}}
+            if checkpoint is not None:
+                query["_id"]["$gt"] = checkpoint
+            subscribers = await db.newsletters.find(query, {"email": 1}) \
+                .sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not subscribers:
+                await db.broadcasts.update_one(
+                    {"_id": job["_id"], "locked_by": self.worker_id, "status": RUNNING},
+                    {"$set": {"status": DONE, "finished_at": datetime.utcnow()},
+                     "$unset": {"locked_by": "", "locked_until": ""}},
+                )
+                logger.info("Broadcast finished", extra=fields)
+                return
+
+            counts = await self._send_batch(job, subscribers, pacer, semaphore)
+            checkpoint = subscribers[-1]["_id"]
+            update = {"$set": {"checkpoint": checkpoint, **self._lease(datetime.utcnow())}}
+            if counts:
+                update["$inc"] = counts
+            current = await db.broadcasts.find_one_and_update(
+                {"_id": job["_id"], "locked_by": self.worker_id},
+                update,
+                projection={"status": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if current is None:
+                logger.warning("Broadcast lease lost", extra=fields)
+                return
+            if current["status"] != RUNNING:
+                # paused or cancelled from the admin API
+                await db.broadcasts.update_one(
+                    {"_id": job["_id"], "locked_by": self.worker_id},
+                    {"$unset": {"locked_by": "", "locked_until": ""}},
+                )
+                logger.info("Broadcast stopped", extra={**fields, "status": current["status"]})
+                return
+
+    async def _send_batch(self, job: dict, subscribers: list, pacer: _Pacer, semaphore: asyncio.Semaphore) -> dict:
+        now = datetime.utcnow()
+        rows = [
+            {"broadcast_id": job["_id"], "subscriber_id": s["_id"], "email": s.get("email"),
+             "status": SENDING, "created_at": now}
+            for s in subscribers
+        ]
+        skip = set()
+        try:
+            await db.broadcast_recipients.insert_many(rows, ordered=False)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            if any(e.get("code") != 11000 for e in errors):
+                raise
+            # already recorded by an earlier run of this batch
+            skip = {rows[e["index"]]["subscriber_id"] for e in errors}
+
+        async def send(subscriber: dict):
+            async with semaphore:
+                if not subscriber.get("email"):
+                    return subscriber["_id"], REJECTED, "no email address"
+                await pacer.wait()
+                try:
+                    await deliver_email(job["subject"], job["html"], subscriber["email"], job.get("text"))
+                except Exception as exc:
+                    return subscriber["_id"], REJECTED if is_permanent(exc) else FAILED, str(exc)
+                return subscriber["_id"], SENT, None
+
+        results = await asyncio.gather(*(send(s) for s in subscribers if s["_id"] not in skip))
+        if not results:
+            return {}
+
+        done_at = datetime.utcnow()
+        updates, counts = [], {}
+        for subscriber_id, outcome, error in results:
+            update = {"status": outcome, "sent_at": done_at} if outcome == SENT else {"status": outcome, "error": error}
+            updates.append(UpdateOne({"broadcast_id": job["_id"], "subscriber_id": subscriber_id}, {"$set": update}))
+            counts[outcome] = counts.get(outcome, 0) + 1
+            BROADCAST_RECIPIENTS.labels(outcome).inc()
+        await db.broadcast_recipients.bulk_write(updates, ordered=False)
+        return counts
+
+
+broadcast_runner = BroadcastRunner()
@@ -0,0 +1,44 @@
+# app/codec.py
+from typing import Annotated, Any, Generic, Optional, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, TypeAdapter
+
+# Mongo documents go straight into these models: ObjectIds become strings once, here,
+# and datetimes stay datetimes until pydantic-core writes them out as ISO 8601.
+
+def _to_str(value: Any) -> Any:
+    return value if value is None or isinstance(value, str) else str(value)
+
+ObjectIdStr = Annotated[str, BeforeValidator(str)]
+# stored form fields are strings, but bulk updates may have written numbers/bools
+Text = Annotated[Optional[str], BeforeValidator(_to_str)]
+
+
+class MongoModel(BaseModel):
+    """Output model built from a raw Mongo document: `_id` is read as `id`, unknown fields are ignored."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: ObjectIdStr = Field(validation_alias="_id")
+
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+class Page(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: Optional[str] = None
+
+
+_page_adapters: dict = {}
+
+def page_response(model: type[BaseModel], docs: list, next_cursor: Optional[str]) -> Response:
+    """
+    Validate raw documents into Page[model] and serialize it in one pass on the
+    pydantic-core side, bypassing FastAPI's jsonable_encoder round trip.
+    """
+    adapter = _page_adapters.get(model)
+    if adapter is None:
+        adapter = _page_adapters[model] = TypeAdapter(Page[model])
+    page = adapter.validate_python({"items": docs, "next_cursor": next_cursor})
+    return Response(adapter.dump_json(page), media_type="application/json")
@@ -0,0 +1,133 @@
+# app/compression.py
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:   # optional: without it responses are gzip-only
+    brotli = None
+
+# ------------------------
+# Settings
+# ------------------------
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))      # bytes; smaller bodies go out as-is
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))  # 4-5: close to gzip speed, smaller output
+
+_COMPRESSIBLE = (b"application/json", b"application/x-ndjson", b"text/")
+
+
+def _accepted(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._br = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        else:
+            # wbits 16+: gzip container
+            self._gz = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        if self.coding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Brotli or gzip, whichever the client prefers and we support (br first).
+
+    Only JSON/NDJSON/text bodies of at least COMPRESS_MIN_SIZE bytes are compressed;
+    a body that arrives in one piece smaller than that is sent untouched. Streaming
+    responses (the exports) are compressed chunk by chunk with a sync flush, so they
+    keep streaming. Empty bodies (304, 204) pass through unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers", []))
+        coding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if coding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = dict(message.get("headers", []))
+                content_type = response_headers.get(b"content-type", b"")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or not content_type.startswith(_COMPRESSIBLE)
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(coding)
+                new_headers = [
+                    (k, v) for k, v in start_message.get("headers", [])
+                    if k not in (b"content-length", b"content-encoding")
+                ]
+                new_headers.append((b"content-encoding", coding.encode()))
+                vary = [v for k, v in new_headers if k == b"vary"]
+                if not vary:
+                    new_headers.append((b"vary", b"Accept-Encoding"))
+                elif b"accept-encoding" not in vary[0].lower():
+                    new_headers = [(k, v) for k, v in new_headers if k != b"vary"]
+                    new_headers.append((b"vary", vary[0] + b", Accept-Encoding"))
+                await send({**start_message, "headers": new_headers})
+
+            await send({
+                "type": "http.response.body",
+                "body": encoder.chunk(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,11 +1,172 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
+# app/database.py
 import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+from .metrics import MongoCommandMetrics
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI")
-DB_NAME = os.getenv("DB_NAME") or os.getenv("MONGO_DB_NAME")
+# ------------------------
+# Settings (one client per worker process)
+# ------------------------
+MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or "mongodb://localhost:27017"
+DB_NAME = os.getenv("DB_NAME") or os.getenv("MONGO_DB_NAME") or "sellharborx"
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+# zstd needs the `zstandard` package, snappy needs `python-snappy`; unavailable ones are skipped by the driver
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener, monitoring.CommandListener):
+    """
+    Connection pool and command counters fed by pymongo's monitoring events.
+    Events arrive on driver threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pool = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checked_out": 0,
+            "checkout_failures": 0,
+            "pool_cleared": 0,
+        }
+        self.commands: dict[str, dict] = {}
+
+    def _bump(self, key: str, delta: int = 1):
+        with self._lock:
+            self.pool[key] += delta
+
+    # --- pool events ---
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump("pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._bump("checked_out")
+
+    def connection_checked_in(self, event):
+        self._bump("checked_out", -1)
+
+    # --- command events ---
+    def _record(self, name: str, duration_micros: int, failed: bool):
+        with self._lock:
+            stats = self.commands.setdefault(name, {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = duration_micros / 1000
+            stats["count"] += 1
+            stats["failures"] += int(failed)
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.command_name, event.duration_micros, False)
+
+    def failed(self, event):
+        self._record(event.command_name, event.duration_micros, True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pool = dict(self.pool)
+            pool["open"] = pool["connections_created"] - pool["connections_closed"]
+            commands = {
+                name: {**s, "avg_ms": round(s["total_ms"] / s["count"], 3) if s["count"] else 0.0}
+                for name, s in self.commands.items()
+            }
+        return {"pool": pool, "commands": commands}
+
+
+class MongoConnection:
+    """Owns the worker's single Motor client; opened and closed by the app lifespan."""
+
+    def __init__(self):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.monitor = PoolMonitor()
+
+    def connect(self):
+        if self.client is not None:
+            return
+        self.client = AsyncIOMotorClient(
+            MONGO_URI,
+            appname="sellharborx-backend",
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            compressors=MONGO_COMPRESSORS,
+            readPreference=MONGO_READ_PREFERENCE,
+            event_listeners=[self.monitor, MongoCommandMetrics()],
+        )
+        self.db = self.client[DB_NAME]
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.db = None
+
+    def get_db(self) -> AsyncIOMotorDatabase:
+        if self.db is None:
+            raise RuntimeError("MongoDB is not connected; mongo.connect() runs in the app lifespan")
+        return self.db
+
+
+mongo = MongoConnection()
+
+
+class _DatabaseProxy:
+    """
+    Stand-in for the Motor database so modules can keep `from ..database import db`
+    at import time while the client itself is created inside the lifespan.
+    """
+
+    def __getattr__(self, name):
+        return getattr(mongo.get_db(), name)
+
+    def __getitem__(self, name):
+        return mongo.get_db()[name]
+
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[DB_NAME]
+db = _DatabaseProxy()
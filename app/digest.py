@@ -0,0 +1,135 @@
+# app/digest.py
+import os
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import IndexModel
+
+from .database import db
+from .email_templates import render
+from .outbox import email_job, enqueue_emails
+from .utils import ADMIN_EMAIL
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Digest settings
+# ------------------------
+DIGEST_ENABLED = os.getenv("DIGEST_ENABLED", "true").lower() in ("1", "true", "yes")
+DIGEST_WINDOW_SECONDS = int(os.getenv("DIGEST_WINDOW_SECONDS", "900"))   # max age of the oldest held notification
+DIGEST_MAX_ITEMS = int(os.getenv("DIGEST_MAX_ITEMS", "50"))             # flush early once this many are held
+DIGEST_CHECK_INTERVAL = float(os.getenv("DIGEST_CHECK_INTERVAL", "30"))
+DIGEST_LEASE_SECONDS = int(os.getenv("DIGEST_LEASE_SECONDS", "300"))
+
+# Held admin notifications live in email_outbox with their own states, so holding
+# one costs nothing extra: it is part of the same insert_many as the user email.
+# digest -> digesting (claimed by a flush) -> digested (summary queued)
+HELD, CLAIMED, DIGESTED = "digest", "digesting", "digested"
+
+INDEXES = {
+    "email_outbox": [IndexModel([("status", 1), ("created_at", 1)])],
+}
+
+def admin_notification(kind: str, subject: str, html_content: str, text_fallback: Optional[str] = None,
+                       urgent: bool = False) -> dict:
+    """
+    Outbox document for an admin notification.
+    Urgent notifications (and all of them when DIGEST_ENABLED is off) are sent
+    on their own right away; the rest are held for the next digest.
+    """
+    job = email_job(subject, html_content, ADMIN_EMAIL, text_fallback)
+    if DIGEST_ENABLED and not urgent:
+        job["status"] = HELD
+        job["kind"] = kind
+    return job
+
+
+class DigestAggregator:
+    """
+    Periodically folds held admin notifications into one summary email.
+
+    A flush happens when DIGEST_MAX_ITEMS are held or the oldest one is older
+    than DIGEST_WINDOW_SECONDS. Items are claimed by id with a per-flush
+    digest_id, so concurrent flushes in other workers never include the same item;
+    claims left behind by a crashed worker are picked up again after the lease.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        if self._task is None and DIGEST_ENABLED:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                while await self.flush_if_due():
+                    pass
+            except Exception:
+                logger.exception("Admin digest flush failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), DIGEST_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claimable(self, now: datetime) -> dict:
+        return {"$or": [
+            {"status": HELD},
+            {"status": CLAIMED, "digest_claimed_at": {"$lte": now - timedelta(seconds=DIGEST_LEASE_SECONDS)}},
+        ]}
+
+    async def flush_if_due(self, force: bool = False) -> bool:
+        """Send one digest if one is due. Returns True if a digest was queued."""
+        now = datetime.utcnow()
+        claimable = self._claimable(now)
+        held = await db.email_outbox.find(claimable, {"_id": 1, "created_at": 1}) \
+            .sort("created_at", 1).limit(DIGEST_MAX_ITEMS).to_list(length=DIGEST_MAX_ITEMS)
+        if not held:
+            return False
+        oldest = held[0]["created_at"]
+        if not force and len(held) < DIGEST_MAX_ITEMS and now - oldest < timedelta(seconds=DIGEST_WINDOW_SECONDS):
+            return False
+
+        digest_id = uuid.uuid4().hex
+        await db.email_outbox.update_many(
+            {"_id": {"$in": [h["_id"] for h in held]}, **claimable},
+            {"$set": {"status": CLAIMED, "digest_id": digest_id, "digest_claimed_at": now}},
+        )
+        items = await db.email_outbox.find(
+            {"digest_id": digest_id}, {"kind": 1, "subject": 1, "text": 1, "created_at": 1}
+        ).sort("created_at", 1).to_list(length=DIGEST_MAX_ITEMS)
+        if not items:
+            return False
+
+        counts: dict[str, int] = {}
+        for item in items:
+            counts[item.get("kind", "other")] = counts.get(item.get("kind", "other"), 0) + 1
+        html, text = render("admin_digest", items=items, counts=counts, now=now)
+        subject = f"SellHarborX — {len(items)} new submission{'s' if len(items) != 1 else ''}"
+        summary = email_job(subject, html, ADMIN_EMAIL, text)
+        summary["digest_id"] = digest_id
+        await enqueue_emails(summary)
+
+        # sent_at lets the outbox TTL index purge the folded notifications
+        await db.email_outbox.update_many(
+            {"digest_id": digest_id, "status": CLAIMED},
+            {"$set": {"status": DIGESTED, "sent_at": now}},
+        )
+        logger.info("Admin digest queued", extra={"notifications": len(items), "digest_id": digest_id})
+        return True
+
+
+digest_aggregator = DigestAggregator()
@@ -0,0 +1,59 @@
+# app/email_templates.py
+import os
+from functools import lru_cache
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates", "email")
+
+# Each entry renders one email: "<name>.html" (auto-escaped) plus "<name>.txt" (plain text).
+# Names are "<form>_<recipient>".
+TEMPLATES = (
+    "audit_user", "audit_admin",
+    "contact_user", "contact_admin",
+    "meeting_user", "meeting_admin",
+    "newsletter_user", "newsletter_admin",
+    "package_user", "package_admin",
+    "signup_user", "signup_admin",
+    "admin_digest",
+)
+
+# Templates whose output does not depend on the submission; rendered once and reused.
+STATIC_TEMPLATES = ("newsletter_user",)
+
+# auto_reload off: templates are read and compiled once per worker, the static markup
+# ends up as constants in the compiled code and only the variables are filled per call.
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+    auto_reload=False,
+    undefined=StrictUndefined,
+    cache_size=-1,
+)
+
+_compiled: dict = {}
+
+def load_templates():
+    """Compile every registered template. Called from the app lifespan so a broken template fails the boot."""
+    for name in TEMPLATES:
+        _compiled[name] = (_env.get_template(f"{name}.html"), _env.get_template(f"{name}.txt"))
+
+def _get(name: str):
+    if name not in _compiled:
+        if name not in TEMPLATES:
+            raise KeyError(f"Unknown email template: {name}")
+        _compiled[name] = (_env.get_template(f"{name}.html"), _env.get_template(f"{name}.txt"))
+    return _compiled[name]
+
+def render(name: str, **context) -> tuple[str, Optional[str]]:
+    """Render a registered template, returning (html, text)."""
+    if name in STATIC_TEMPLATES and not context:
+        return render_static(name)
+    html_template, text_template = _get(name)
+    return html_template.render(**context), text_template.render(**context)
+
+@lru_cache(maxsize=None)
+def render_static(name: str) -> tuple[str, Optional[str]]:
+    html_template, text_template = _get(name)
+    return html_template.render(), text_template.render()
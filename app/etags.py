@@ -0,0 +1,47 @@
+# app/etags.py
+import asyncio
+import hashlib
+import json
+from typing import Optional
+
+from .database import db
+
+# Weak validators for the admin list/export responses.
+#
+# A list changes when a document is inserted (new latest _id), deleted (count
+# drops) or edited through the admin API (version bump). Each part is an indexed
+# or metadata read, so checking the validator never scans the collection:
+# - latest _id: sort on the _id index, limit 1, _id-only projection
+# - count: collection metadata when unfiltered, otherwise an index-backed count
+# - version: one small document per collection in `list_versions`
+
+async def bump_list_version(name: str):
+    """Call after any admin write that edits or removes documents of `name`."""
+    await db.list_versions.update_one({"_id": name}, {"$inc": {"v": 1}}, upsert=True)
+
+async def list_etag(collection, query: dict, **params) -> str:
+    async def latest():
+        doc = await collection.find_one(query, {"_id": 1}, sort=[("_id", -1)])
+        return str(doc["_id"]) if doc else None
+
+    async def count():
+        if not query:
+            return await collection.estimated_document_count()
+        return await collection.count_documents(query)
+
+    async def version():
+        doc = await db.list_versions.find_one({"_id": collection.name})
+        return doc["v"] if doc else 0
+
+    parts = await asyncio.gather(latest(), count(), version())
+    raw = json.dumps([collection.name, *parts, query, params], default=str, sort_keys=True)
+    return 'W/"%s"' % hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
@@ -1,12 +1,31 @@
 # app/forms/admin.py
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from bson import ObjectId
-from ..utils import db, verify_password, create_access_token, get_password_hash
+from bson.errors import InvalidId
+from pymongo import IndexModel
+from datetime import datetime
+from typing import Literal
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from ..database import mongo
+from ..utils import db, verify_password_async, create_access_token, hash_password_async
+from ..outbox import outbox_status
+from ..broadcast import (
+    BROADCAST_FIELDS, CANCELLED, PAUSED, QUEUED, RUNNING, RECIPIENT_STATES, change_broadcast_status, create_broadcast,
+)
+from ..stats import dashboard_stats
+from ..cache import TTLCache
+from ..codec import MongoModel, Page, Text, page_response
+from ..etags import bump_list_version, etag_matches, list_etag
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
+import csv
+import io
 import os
+import time
 
 # ------------------------
 # JWT / OAuth2 setup
@@ -19,6 +38,32 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login")
 
 admin_router = APIRouter(prefix="/admin")
 
+INDEXES = {
+    "admins": [IndexModel([("username", 1)], unique=True)],
+}
+
+# ------------------------
+# Auth caches (per worker)
+# ------------------------
+# token -> decoded payload, kept until the token's own expiry
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+# admin username (token sub) -> admin record without the password hash
+ADMIN_CACHE_SIZE = int(os.getenv("ADMIN_CACHE_SIZE", "256"))
+ADMIN_CACHE_TTL = float(os.getenv("ADMIN_CACHE_TTL", "60"))
+
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_admin_cache = TTLCache(maxsize=ADMIN_CACHE_SIZE, ttl=ADMIN_CACHE_TTL)
+
+def invalidate_admin(username: str | None = None):
+    """
+    Drop cached admin principals after an admin record changes.
+    Other workers pick the change up within ADMIN_CACHE_TTL.
+    """
+    if username is None:
+        _admin_cache.clear()
+    else:
+        _admin_cache.pop(username)
+
 # ------------------------
 # Pydantic models
 # ------------------------
@@ -30,10 +75,9 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-class UserOut(BaseModel):
-    username: str
-    email: str
-    id: str
+class UserOut(MongoModel):
+    username: Text = None
+    email: Text = None
 
 class UserUpdateIn(BaseModel):
     username: str | None = None
@@ -48,26 +92,119 @@ async def get_current_admin(token: str = Depends(oauth2_scheme)):
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials"
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    payload = _token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
             raise credentials_exception
-    except JWTError:
+        # the signature is verified once; afterwards only the expiry matters
+        exp = payload.get("exp")
+        if exp is not None:
+            _token_cache.set(token, payload, ttl=exp - time.time())
+    elif payload.get("exp") is not None and payload["exp"] <= time.time():
+        _token_cache.pop(token)
         raise credentials_exception
 
-    admin = await db.admins.find_one({"username": username})
-    if not admin:
+    username: str = payload.get("sub")
+    if username is None:
         raise credentials_exception
+
+    admin = _admin_cache.get(username)
+    if admin is None:
+        admin = await db.admins.find_one({"username": username}, {"password": 0})
+        if not admin:
+            raise credentials_exception
+        _admin_cache.set(username, admin)
     return admin
 
+# ------------------------
+# Pagination / filtering
+# ------------------------
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def build_filter_query(
+    email: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> dict:
+    """Mongo filter for the admin email / date-range filters."""
+    query = {}
+    if email:
+        # newsletters store emails lowercased, the other forms store them as typed
+        email = email.strip()
+        query["email"] = {"$in": sorted({email, email.lower()})}
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+    return query
+
+def list_filters(
+    email: str | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+) -> dict:
+    """Shared filter params for the admin list and export endpoints, as a Mongo filter."""
+    return build_filter_query(email, created_from, created_to)
+
+def list_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = Query(None, description="next_cursor from the previous page"),
+    query: dict = Depends(list_filters),
+    if_none_match: str | None = Header(None),
+):
+    """
+    Shared query params for the admin list endpoints.
+    Returns the Mongo filter (without the cursor) plus paging info.
+    """
+    if after is not None:
+        try:
+            after = ObjectId(after)
+        except (InvalidId, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"query": query, "limit": limit, "after": after, "if_none_match": if_none_match}
+
+async def paginate(collection, params: dict, projection: dict, model, cacheable: bool = True) -> Response:
+    """
+    Keyset pagination on _id, newest first. ObjectIds grow with insertion time,
+    so this follows created_at order without skip() and uses the _id index.
+    Returns the page already serialized as Page[model], or 304 when the
+    client's ETag still matches (checked before the page is fetched).
+    Pass cacheable=False for collections whose documents change without the
+    list version being bumped (see app/etags.py); those get no ETag.
+    """
+    etag = None
+    if cacheable:
+        etag = await list_etag(collection, params["query"], limit=params["limit"], after=params["after"])
+        if etag_matches(params["if_none_match"], etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    query = dict(params["query"])
+    if params["after"] is not None:
+        query["_id"] = {"$lt": params["after"]}
+    limit = params["limit"]
+    # fetch one extra document to know whether another page exists
+    docs = await collection.find(query, projection).sort("_id", -1).limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    response = page_response(model, docs, str(docs[-1]["_id"]) if has_more else None)
+    if etag is not None:
+        response.headers["ETag"] = etag
+        # the dashboard revalidates every time; unchanged lists cost a 304
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
 # ------------------------
 # Admin login
 # ------------------------
 @admin_router.post("/login", response_model=Token)
 async def admin_login(form_data: AdminLoginIn):
     admin = await db.admins.find_one({"username": form_data.username})
-    if not admin or not verify_password(form_data.password, admin["password"]):
+    if not admin or not await verify_password_async(form_data.password, admin["password"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     access_token = create_access_token({"sub": admin["username"]})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -75,13 +212,11 @@ async def admin_login(form_data: AdminLoginIn):
 # ------------------------
 # Users CRUD
 # ------------------------
-@admin_router.get("/users", response_model=list[UserOut])
-async def list_users(current_admin: dict = Depends(get_current_admin)):
-    users_cursor = db.users.find({}, {"password": 0})
-    users = []
-    async for u in users_cursor:
-        users.append({"username": u.get("username"), "email": u.get("email"), "id": str(u.get("_id"))})
-    return users
+USER_FIELDS = {"username": 1, "email": 1}
+
+@admin_router.get("/users", response_model=Page[UserOut])
+async def list_users(params: dict = Depends(list_params), current_admin: dict = Depends(get_current_admin)):
+    return await paginate(db.users, params, USER_FIELDS, UserOut)
 
 @admin_router.delete("/users/{user_id}", status_code=204)
 async def delete_user(user_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -92,6 +227,7 @@ async def delete_user(user_id: str, current_admin: dict = Depends(get_current_ad
     result = await db.users.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    await bump_list_version("users")
     return Response(status_code=204)
 
 @admin_router.put("/users/{user_id}", response_model=UserOut)
@@ -109,17 +245,22 @@ async def update_user(user_id: str, payload: UserUpdateIn, current_admin: dict =
     if payload.password is not None:
         if len(payload.password.encode('utf-8')) > 72:
             raise HTTPException(status_code=400, detail="Password too long")
-        update_doc["password"] = get_password_hash(payload.password)
+        update_doc["password"] = await hash_password_async(payload.password)
 
     if not update_doc:
         raise HTTPException(status_code=400, detail="Nothing to update")
 
-    result = await db.users.update_one({"_id": oid}, {"$set": update_doc})
+    try:
+        result = await db.users.update_one({"_id": oid}, {"$set": update_doc})
+    except DuplicateKeyError:
+        # unique index on users(email)
+        raise HTTPException(status_code=409, detail="Email already registered")
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    await bump_list_version("users")
 
-    u = await db.users.find_one({"_id": oid}, {"password": 0})
-    return {"username": u.get("username"), "email": u.get("email"), "id": str(u.get("_id"))}
+    u = await db.users.find_one({"_id": oid}, USER_FIELDS)
+    return UserOut.model_validate(u)
 
 # ------------------------
 # Admin info
@@ -128,23 +269,152 @@ async def update_user(user_id: str, payload: UserUpdateIn, current_admin: dict =
 async def admin_me(current_admin: dict = Depends(get_current_admin)):
     return {"username": current_admin.get("username")}
 
+@admin_router.get("/cache/stats")
+async def cache_stats(current_admin: dict = Depends(get_current_admin)):
+    return {"tokens": _token_cache.stats(), "admins": _admin_cache.stats()}
+
+@admin_router.get("/db/stats")
+async def db_stats(current_admin: dict = Depends(get_current_admin)):
+    """Connection pool and per-command timings for this worker's Mongo client."""
+    return mongo.monitor.snapshot()
+
+# ------------------------
+# Dashboard stats
+# ------------------------
+@admin_router.get("/stats")
+async def get_stats(
+    days: int = Query(30, ge=1, le=366),
+    source: Literal["counters", "aggregate"] = "counters",
+    current_admin: dict = Depends(get_current_admin),
+):
+    """Totals, submissions per day and package popularity in one response (cached for a few seconds)."""
+    return await dashboard_stats(days, source)
+
+# ------------------------
+# Email outbox
+# ------------------------
+@admin_router.get("/outbox")
+async def get_outbox(failed_limit: int = Query(50, ge=1, le=500), current_admin: dict = Depends(get_current_admin)):
+    return await outbox_status(failed_limit)
+
+# ------------------------
+# Newsletter broadcasts
+# ------------------------
+class BroadcastIn(BaseModel):
+    subject: str = Field(min_length=1, max_length=200)
+    html: str = Field(min_length=1)
+    text: str | None = None
+    rate: float | None = Field(None, gt=0, description="messages/s, capped at BROADCAST_RATE")
+
+    @field_validator("subject")
+    @classmethod
+    def single_line_subject(cls, value: str) -> str:
+        # the subject becomes a mail header for every subscriber; a line break would inject headers
+        if "\r" in value or "\n" in value:
+            raise ValueError("Subject must be a single line")
+        return value
+
+class BroadcastOut(MongoModel):
+    subject: Text = None
+    status: Text = None
+    rate: float | None = None
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    rejected: int = 0
+    unknown: int = 0
+    created_by: Text = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+class BroadcastRecipientOut(MongoModel):
+    email: Text = None
+    status: Text = None
+    error: Text = None
+    sent_at: datetime | None = None
+    created_at: datetime | None = None
+
+def _broadcast_id(raw: str) -> ObjectId:
+    try:
+        return ObjectId(raw)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid broadcast id")
+
+async def _change_broadcast(raw_id: str, from_statuses: tuple, to_status: str) -> BroadcastOut:
+    broadcast_id = _broadcast_id(raw_id)
+    job = await change_broadcast_status(broadcast_id, from_statuses, to_status)
+    if job is None:
+        current = await db.broadcasts.find_one({"_id": broadcast_id}, {"status": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Broadcast not found")
+        raise HTTPException(status_code=409, detail=f"Broadcast is {current['status']}")
+    return BroadcastOut.model_validate(job)
+
+@admin_router.post("/broadcasts", response_model=BroadcastOut, status_code=201)
+async def start_broadcast(payload: BroadcastIn, current_admin: dict = Depends(get_current_admin)):
+    """Queue an email to every current newsletter subscriber; sending happens in the background."""
+    job = await create_broadcast(
+        payload.subject, payload.html, payload.text, rate=payload.rate, created_by=current_admin.get("username"),
+    )
+    if job is None:
+        raise HTTPException(status_code=400, detail="There are no newsletter subscribers")
+    return BroadcastOut.model_validate(job)
+
+@admin_router.get("/broadcasts", response_model=list[BroadcastOut])
+async def list_broadcasts(limit: int = Query(20, ge=1, le=100), current_admin: dict = Depends(get_current_admin)):
+    docs = await db.broadcasts.find({}, BROADCAST_FIELDS).sort("created_at", -1).limit(limit).to_list(length=limit)
+    return [BroadcastOut.model_validate(d) for d in docs]
+
+@admin_router.get("/broadcasts/{broadcast_id}", response_model=BroadcastOut)
+async def get_broadcast(broadcast_id: str, current_admin: dict = Depends(get_current_admin)):
+    job = await db.broadcasts.find_one({"_id": _broadcast_id(broadcast_id)}, BROADCAST_FIELDS)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return BroadcastOut.model_validate(job)
+
+@admin_router.post("/broadcasts/{broadcast_id}/pause", response_model=BroadcastOut)
+async def pause_broadcast(broadcast_id: str, current_admin: dict = Depends(get_current_admin)):
+    return await _change_broadcast(broadcast_id, (QUEUED, RUNNING), PAUSED)
+
+@admin_router.post("/broadcasts/{broadcast_id}/resume", response_model=BroadcastOut)
+async def resume_broadcast(broadcast_id: str, current_admin: dict = Depends(get_current_admin)):
+    return await _change_broadcast(broadcast_id, (PAUSED,), QUEUED)
+
+@admin_router.post("/broadcasts/{broadcast_id}/cancel", response_model=BroadcastOut)
+async def cancel_broadcast(broadcast_id: str, current_admin: dict = Depends(get_current_admin)):
+    return await _change_broadcast(broadcast_id, (QUEUED, RUNNING, PAUSED), CANCELLED)
+
+@admin_router.get("/broadcasts/{broadcast_id}/recipients", response_model=Page[BroadcastRecipientOut])
+async def list_broadcast_recipients(
+    broadcast_id: str,
+    state: Literal[RECIPIENT_STATES] | None = Query(None, alias="status"),
+    params: dict = Depends(list_params),
+    current_admin: dict = Depends(get_current_admin),
+):
+    """Per-recipient outcomes, newest first; filter by status (e.g. failed) or email."""
+    query = {**params["query"], "broadcast_id": _broadcast_id(broadcast_id)}
+    if state is not None:
+        query["status"] = state
+    # outcomes change in place as a batch is sent, so no ETag here
+    return await paginate(db.broadcast_recipients, {**params, "query": query}, {"broadcast_id": 0, "subscriber_id": 0},
+                          BroadcastRecipientOut, cacheable=False)
+
 # ------------------------
 # Meetings CRUD
 # ------------------------
-@admin_router.get("/meetings")
-async def list_meetings(current_admin: dict = Depends(get_current_admin)):
-    meetings_cursor = db.meetings.find({})
-    meetings = []
-    async for m in meetings_cursor:
-        meetings.append({
-            "id": str(m.get("_id")),
-            "name": m.get("name"),
-            "email": m.get("email"),
-            "agenda": m.get("agenda"),
-            "date": m.get("date"),
-            "created_at": m.get("created_at").isoformat() if m.get("created_at") else None
-        })
-    return meetings
+MEETING_FIELDS = {"name": 1, "email": 1, "agenda": 1, "date": 1, "created_at": 1}
+
+class MeetingOut(MongoModel):
+    name: Text = None
+    email: Text = None
+    agenda: Text = None
+    date: Text = None
+    created_at: datetime | None = None
+
+@admin_router.get("/meetings", response_model=Page[MeetingOut])
+async def list_meetings(params: dict = Depends(list_params), current_admin: dict = Depends(get_current_admin)):
+    return await paginate(db.meetings, params, MEETING_FIELDS, MeetingOut)
 
 @admin_router.delete("/meetings/{meeting_id}", status_code=204)
 async def delete_meeting(meeting_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -155,27 +425,29 @@ async def delete_meeting(meeting_id: str, current_admin: dict = Depends(get_curr
     result = await db.meetings.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Meeting not found")
+    await bump_list_version("meetings")
     return Response(status_code=204)
 
 # ------------------------
 # Audits CRUD
 # ------------------------
-@admin_router.get("/audits")
-async def list_audits(current_admin: dict = Depends(get_current_admin)):
-    audits_cursor = db.audits.find({})
-    audits = []
-    async for a in audits_cursor:
-        audits.append({
-            "id": str(a.get("_id")),
-            "firstname": a.get("firstname"),
-            "lastname": a.get("lastname"),
-            "email": a.get("email"),
-            "brandname": a.get("brandname"),
-            "producturl": a.get("producturl"),
-            "message": a.get("message"),
-            "created_at": a.get("created_at").isoformat() if a.get("created_at") else None
-        })
-    return audits
+AUDIT_FIELDS = {
+    "firstname": 1, "lastname": 1, "email": 1, "brandname": 1,
+    "producturl": 1, "message": 1, "created_at": 1,
+}
+
+class AuditOut(MongoModel):
+    firstname: Text = None
+    lastname: Text = None
+    email: Text = None
+    brandname: Text = None
+    producturl: Text = None
+    message: Text = None
+    created_at: datetime | None = None
+
+@admin_router.get("/audits", response_model=Page[AuditOut])
+async def list_audits(params: dict = Depends(list_params), current_admin: dict = Depends(get_current_admin)):
+    return await paginate(db.audits, params, AUDIT_FIELDS, AuditOut)
 
 @admin_router.delete("/audits/{audit_id}", status_code=204)
 async def delete_audit(audit_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -186,25 +458,24 @@ async def delete_audit(audit_id: str, current_admin: dict = Depends(get_current_
     result = await db.audits.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Audit not found")
+    await bump_list_version("audits")
     return Response(status_code=204)
 
 # ------------------------
 # Contacts CRUD
 # ------------------------
-@admin_router.get("/contacts")
-async def list_contacts(current_admin: dict = Depends(get_current_admin)):
-    cursor = db.contacts.find({})
-    contacts = []
-    async for c in cursor:
-        contacts.append({
-            "id": str(c.get("_id")),
-            "firstname": c.get("firstname"),
-            "email": c.get("email"),
-            "subject": c.get("subject"),
-            "message": c.get("message"),
-            "created_at": c.get("created_at").isoformat() if c.get("created_at") else None
-        })
-    return contacts
+CONTACT_FIELDS = {"firstname": 1, "email": 1, "subject": 1, "message": 1, "created_at": 1}
+
+class ContactOut(MongoModel):
+    firstname: Text = None
+    email: Text = None
+    subject: Text = None
+    message: Text = None
+    created_at: datetime | None = None
+
+@admin_router.get("/contacts", response_model=Page[ContactOut])
+async def list_contacts(params: dict = Depends(list_params), current_admin: dict = Depends(get_current_admin)):
+    return await paginate(db.contacts, params, CONTACT_FIELDS, ContactOut)
 
 @admin_router.delete("/contacts/{contact_id}", status_code=204)
 async def delete_contact(contact_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -215,22 +486,21 @@ async def delete_contact(contact_id: str, current_admin: dict = Depends(get_curr
     result = await db.contacts.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contact not found")
+    await bump_list_version("contacts")
     return Response(status_code=204)
 
 # ------------------------
 # Newsletters CRUD
 # ------------------------
-@admin_router.get("/newsletters")
-async def list_newsletters(current_admin: dict = Depends(get_current_admin)):
-    cursor = db.newsletters.find({})
-    out = []
-    async for n in cursor:
-        out.append({
-            "id": str(n.get("_id")),
-            "email": n.get("email"),
-            "created_at": n.get("created_at").isoformat() if n.get("created_at") else None
-        })
-    return out
+NEWSLETTER_FIELDS = {"email": 1, "created_at": 1}
+
+class NewsletterOut(MongoModel):
+    email: Text = None
+    created_at: datetime | None = None
+
+@admin_router.get("/newsletters", response_model=Page[NewsletterOut])
+async def list_newsletters(params: dict = Depends(list_params), current_admin: dict = Depends(get_current_admin)):
+    return await paginate(db.newsletters, params, NEWSLETTER_FIELDS, NewsletterOut)
 
 @admin_router.delete("/newsletters/{nid}", status_code=204)
 async def delete_newsletter(nid: str, current_admin: dict = Depends(get_current_admin)):
@@ -241,29 +511,37 @@ async def delete_newsletter(nid: str, current_admin: dict = Depends(get_current_
     result = await db.newsletters.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Not found")
+    await bump_list_version("newsletters")
     return Response(status_code=204)
 
 # ------------------------
 # Packages CRUD
 # ------------------------
-@admin_router.get("/packages")
-async def list_packages(current_admin: dict = Depends(get_current_admin)):
-    cursor = db.packages.find({})
-    packages = []
-    async for p in cursor:
-        packages.append({
-            "id": str(p.get("_id")),
-            "name": p.get("name"),
-            "email": p.get("email"),
-            "package": p.get("package"),
-            "price": p.get("price"),
-            "company": p.get("company"),
-            "url": p.get("url"),
-            "businessType": p.get("businessType"),
-            "notes": p.get("notes"),
-            "created_at": p.get("created_at").isoformat() if p.get("created_at") else None
-        })
-    return packages
+PACKAGE_FIELDS = {
+    "name": 1, "email": 1, "package": 1, "price": 1, "company": 1,
+    "url": 1, "businessType": 1, "notes": 1, "created_at": 1,
+}
+
+class PackageOut(MongoModel):
+    name: Text = None
+    email: Text = None
+    package: Text = None
+    price: Text = None
+    company: Text = None
+    url: Text = None
+    businessType: Text = None
+    notes: Text = None
+    created_at: datetime | None = None
+
+@admin_router.get("/packages", response_model=Page[PackageOut])
+async def list_packages(
+    package: str | None = Query(None),
+    params: dict = Depends(list_params),
+    current_admin: dict = Depends(get_current_admin),
+):
+    if package:
+        params["query"]["package"] = package
+    return await paginate(db.packages, params, PACKAGE_FIELDS, PackageOut)
 
 @admin_router.delete("/packages/{package_id}", status_code=204)
 async def delete_package(package_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -274,4 +552,271 @@ async def delete_package(package_id: str, current_admin: dict = Depends(get_curr
     result = await db.packages.delete_one({"_id": oid})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Package not found")
+    await bump_list_version("packages")
     return Response(status_code=204)
+
+# ------------------------
+# Streaming exports
+# ------------------------
+# name -> (collection name, projection, output model); shared by the export and bulk endpoints
+ADMIN_COLLECTIONS = {
+    "users": ("users", USER_FIELDS, UserOut),
+    "meetings": ("meetings", MEETING_FIELDS, MeetingOut),
+    "audits": ("audits", AUDIT_FIELDS, AuditOut),
+    "contacts": ("contacts", CONTACT_FIELDS, ContactOut),
+    "newsletters": ("newsletters", NEWSLETTER_FIELDS, NewsletterOut),
+    "packages": ("packages", PACKAGE_FIELDS, PackageOut),
+}
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def _csv_safe(value):
+    # stop spreadsheet apps from evaluating user-submitted text as formulas
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+async def export_chunks(collection, query: dict, projection: dict, model, fmt: str):
+    """
+    Encode documents as they come off the cursor and yield ~64KB chunks,
+    so memory stays flat regardless of collection size.
+    """
+    cursor = collection.find(query, projection).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    async for doc in cursor:
+        row = model.model_validate(doc)
+        if fmt == "ndjson":
+            buffer.write(row.model_dump_json())
+            buffer.write("\n")
+        else:
+            values = row.model_dump(mode="json")
+            if not header_written:
+                writer.writerow(values.keys())
+                header_written = True
+            writer.writerow([_csv_safe(v) for v in values.values()])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+@admin_router.get("/{collection}/export")
+async def export_collection(
+    collection: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    package: str | None = Query(None),
+    query: dict = Depends(list_filters),
+    if_none_match: str | None = Header(None),
+    current_admin: dict = Depends(get_current_admin),
+):
+    if collection not in ADMIN_COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    name, projection, model = ADMIN_COLLECTIONS[collection]
+    if package and name == "packages":
+        query["package"] = package
+
+    etag = await list_etag(db[name], query, format=format)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{collection}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        export_chunks(db[name], query, projection, model, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+        },
+    )
+
+# ------------------------
+# Bulk delete / update
+# ------------------------
+BULK_MAX_IDS = int(os.getenv("BULK_MAX_IDS", "10000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+# fields staff may change through bulk-update; ids, timestamps and passwords are never writable
+BULK_UPDATABLE_FIELDS = {
+    "users": {"username"},
+    "meetings": {"name", "agenda", "date"},
+    "audits": {"firstname", "lastname", "brandname", "producturl", "message"},
+    "contacts": {"firstname", "subject", "message"},
+    "newsletters": set(),
+    "packages": {"name", "package", "price", "company", "url", "businessType", "notes"},
+}
+
+class BulkFilter(BaseModel):
+    email: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    package: str | None = None
+
+class BulkDeleteIn(BaseModel):
+    ids: list[str] | None = None
+    filter: BulkFilter | None = None
+    dry_run: bool = False
+
+class BulkUpdateIn(BulkDeleteIn):
+    set: dict[str, str | int | float | bool | None]
+
+def _bulk_target(collection: str, payload: BulkDeleteIn):
+    """Resolve the collection and validate that exactly one of ids / filter was given."""
+    if collection not in ADMIN_COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    if (payload.ids is None) == (payload.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+    if payload.ids is not None and len(payload.ids) > BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_IDS} ids per request")
+    name = ADMIN_COLLECTIONS[collection][0]
+    query = None
+    if payload.filter is not None:
+        f = payload.filter
+        query = build_filter_query(f.email, f.created_from, f.created_to)
+        if f.package and name == "packages":
+            query["package"] = f.package
+        if not query:
+            # an empty filter would match the whole collection
+            raise HTTPException(status_code=400, detail="Filter must contain at least one condition")
+    return db[name], query
+
+def _parse_ids(raw_ids: list[str]):
+    """Split raw ids into ObjectIds and per-id 'invalid' results, dropping duplicates."""
+    oids, results, seen = [], [], set()
+    for raw in raw_ids:
+        if raw in seen:
+            continue
+        seen.add(raw)
+        try:
+            oids.append(ObjectId(raw))
+        except (InvalidId, TypeError):
+            results.append({"id": raw, "status": "invalid"})
+    return oids, results
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+async def _existing_ids(coll, oids: list) -> set:
+    docs = await coll.find({"_id": {"$in": oids}}, {"_id": 1}).to_list(length=len(oids))
+    return {d["_id"] for d in docs}
+
+async def _ids_matching(coll, query: dict):
+    """Yield matching _ids in chunks, so filter-mode writes run as bounded batches."""
+    last_id = None
+    while True:
+        page_query = dict(query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+        docs = await coll.find(page_query, {"_id": 1}).sort("_id", 1).limit(BULK_CHUNK_SIZE).to_list(length=BULK_CHUNK_SIZE)
+        if not docs:
+            return
+        last_id = docs[-1]["_id"]
+        yield [d["_id"] for d in docs]
+
+@admin_router.post("/{collection}/bulk-delete")
+async def bulk_delete(collection: str, payload: BulkDeleteIn, current_admin: dict = Depends(get_current_admin)):
+    """
+    Delete many documents by id list or filter, in chunks of BULK_CHUNK_SIZE.
+    ids mode reports a status per id; dry_run only counts.
+    """
+    coll, query = _bulk_target(collection, payload)
+
+    if query is not None:
+        if payload.dry_run:
+            return {"dry_run": True, "matched": await coll.count_documents(query)}
+        deleted = 0
+        async for ids in _ids_matching(coll, query):
+            result = await coll.delete_many({"_id": {"$in": ids}})
+            deleted += result.deleted_count
+        await bump_list_version(coll.name)
+        return {"dry_run": False, "deleted": deleted}
+
+    oids, results = _parse_ids(payload.ids)
+    matched = deleted = 0
+    for chunk in _chunks(oids):
+        existing = await _existing_ids(coll, chunk)
+        matched += len(existing)
+        if not payload.dry_run and existing:
+            result = await coll.delete_many({"_id": {"$in": list(existing)}})
+            deleted += result.deleted_count
+        found_status = "would_delete" if payload.dry_run else "deleted"
+        results.extend(
+            {"id": str(oid), "status": found_status if oid in existing else "not_found"} for oid in chunk
+        )
+    out = {"dry_run": payload.dry_run, "matched": matched, "results": results}
+    if not payload.dry_run:
+        await bump_list_version(coll.name)
+        out["deleted"] = deleted
+    return out
+
+@admin_router.post("/{collection}/bulk-update")
+async def bulk_update(collection: str, payload: BulkUpdateIn, current_admin: dict = Depends(get_current_admin)):
+    """
+    $set whitelisted fields on many documents by id list or filter.
+    Writes go through unordered bulk_write per chunk; per-id results in ids mode.
+    """
+    coll, query = _bulk_target(collection, payload)
+    allowed = BULK_UPDATABLE_FIELDS[collection]
+    rejected = sorted(set(payload.set) - allowed)
+    if rejected or not payload.set:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Updatable fields for {collection}: {sorted(allowed) or 'none'}",
+        )
+    update = {"$set": payload.set}
+
+    if query is not None:
+        if payload.dry_run:
+            return {"dry_run": True, "matched": await coll.count_documents(query)}
+        matched = modified = 0
+        conflicts = []
+        async for ids in _ids_matching(coll, query):
+            # one UpdateOne per document, unordered: a unique-index conflict (e.g. packages(email, package))
+            # fails only that document instead of aborting the chunk half-way
+            try:
+                result = await coll.bulk_write([UpdateOne({"_id": oid}, update) for oid in ids], ordered=False)
+                matched += result.matched_count
+                modified += result.modified_count
+            except BulkWriteError as exc:
+                errors = exc.details.get("writeErrors", [])
+                matched += exc.details.get("nMatched", 0)
+                modified += exc.details.get("nModified", 0)
+                conflicts.extend(
+                    {"id": str(ids[e["index"]]), "status": "error", "detail": e.get("errmsg", "write error")}
+                    for e in errors
+                )
+        await bump_list_version(coll.name)
+        return {"dry_run": False, "matched": matched, "modified": modified, "conflicts": conflicts}
+
+    oids, results = _parse_ids(payload.ids)
+    matched = modified = 0
+    for chunk in _chunks(oids):
+        existing = await _existing_ids(coll, chunk)
+        matched += len(existing)
+        targets = [oid for oid in chunk if oid in existing]
+        errors = {}
+        if not payload.dry_run and targets:
+            try:
+                result = await coll.bulk_write([UpdateOne({"_id": oid}, update) for oid in targets], ordered=False)
+                modified += result.modified_count
+            except BulkWriteError as exc:
+                modified += exc.details.get("nModified", 0)
+                errors = {targets[e["index"]]: e.get("errmsg", "write error") for e in exc.details.get("writeErrors", [])}
+        for oid in chunk:
+            if oid not in existing:
+                results.append({"id": str(oid), "status": "not_found"})
+            elif oid in errors:
+                results.append({"id": str(oid), "status": "error", "detail": errors[oid]})
+            else:
+                results.append({"id": str(oid), "status": "would_update" if payload.dry_run else "updated"})
+    out = {"dry_run": payload.dry_run, "matched": matched, "results": results}
+    if not payload.dry_run:
+        await bump_list_version(coll.name)
+        out["modified"] = modified
+    return out
@@ -1,13 +1,43 @@
 # backend/app/forms/audit.py
+import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from datetime import datetime, timedelta
-import asyncio
+from datetime import datetime
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
 
-from ..utils import db, send_email, ADMIN_EMAIL
+from ..utils import db
+from ..outbox import email_job, enqueue_emails
+from ..digest import admin_notification
+from ..email_templates import render
+from ..stats import record_submission
+from ..tasks import background
+from ..metrics import stage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()  # no prefix; main.py will include at top-level
 
+# Duplicate window for the same email + product URL. Submissions are bucketed into
+# fixed 24h windows so a unique index can enforce it in a single write.
+AUDIT_DEDUPE_SECONDS = 24 * 60 * 60
+_EPOCH = datetime(1970, 1, 1)
+
+def audit_dedupe_bucket(created_at: datetime) -> int:
+    return int((created_at - _EPOCH).total_seconds() // AUDIT_DEDUPE_SECONDS)
+
+INDEXES = {
+    "audits": [
+        # partial: audits saved before dedupe_bucket existed are left out of the constraint
+        IndexModel(
+            [("email", 1), ("producturl", 1), ("dedupe_bucket", 1)],
+            unique=True,
+            partialFilterExpression={"dedupe_bucket": {"$exists": True}},
+        ),
+        IndexModel([("created_at", 1)]),
+    ],
+}
+
 class AuditIn(BaseModel):
     firstname: str
     lastname: str
@@ -20,18 +50,9 @@ class AuditIn(BaseModel):
 async def submit_audit(payload: AuditIn):
     """
     Save audit request to DB (collection: audits), send confirmation emails to user + admin.
-    Prevent duplicate (same email + producturl) within 24 hours.
+    Prevent duplicate (same email + producturl) within the same 24h window.
     """
-    # Basic duplicate prevention: same email + producturl within 24 hours
-    cutoff = datetime.utcnow() - timedelta(hours=24)
-    dup = await db.audits.find_one({
-        "email": payload.email,
-        "producturl": payload.producturl,
-        "created_at": { "$gte": cutoff }
-    })
-    if dup:
-        raise HTTPException(status_code=409, detail="An audit request for this product was received recently. Please wait before requesting again.")
-
+    now = datetime.utcnow()
     doc = {
         "firstname": payload.firstname,
         "lastname": payload.lastname,
@@ -39,50 +60,34 @@ async def submit_audit(payload: AuditIn):
         "brandname": payload.brandname,
         "producturl": payload.producturl,
         "message": payload.message,
-        "created_at": datetime.utcnow()
+        "created_at": now,
+        "dedupe_bucket": audit_dedupe_bucket(now)
     }
 
-    result = await db.audits.insert_one(doc)
+    # Unique (email, producturl, dedupe_bucket) index makes the insert the duplicate check
+    with stage("audit", "insert"):
+        try:
+            result = await db.audits.insert_one(doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="An audit request for this product was received recently. Please wait before requesting again.")
 
-    # Build user HTML email
-    html_user = f"""
-    <html>
-      <body style="font-family:Arial,Helvetica,sans-serif;color:#222;">
-        <h2>Thanks {payload.firstname}! Your Free Amazon Audit Request is Confirmed</h2>
-        <p>Hi {payload.firstname},</p>
-        <p>Thank you for requesting a Free Amazon Account Audit from Sellharborx. Our experts are reviewing your store and analyzing opportunities to improve performance, ranking, and conversions.</p>
-        <p><strong>Product URL:</strong> {payload.producturl}</p>
-        <p>You will receive your detailed audit report within 24 to 48 hours. <br>If you have any quick questions, feel free to reply to this email. </p>
-        <p style="margin-top:18px;">Regards<br/>SellHarborX Team</p>
-      </body>
-    </html>
-    """
-    text_user = f"Thanks {payload.firstname}, we received your audit request for {payload.brandname} ({payload.producturl}). Our team will contact you soon."
+    # dashboard counters are not part of the response; bump them in the background
+    await background.submit(record_submission("audits"), "record_submission")
 
-    # Build admin notification
-    html_admin = f"""
-    <html>
-      <body style="font-family:Arial,Helvetica,sans-serif;color:#222;">
-        <h3>New Audit Request</h3>
-        <ul>
-          <li><strong>Name:</strong> {payload.firstname} {payload.lastname}</li>
-          <li><strong>Email:</strong> {payload.email}</li>
-          <li><strong>Brand:</strong> {payload.brandname}</li>
-          <li><strong>Product URL:</strong> {payload.producturl}</li>
-          <li><strong>Message:</strong> {payload.message}</li>
-          <li><strong>Time (UTC):</strong> {datetime.utcnow().isoformat()}</li>
-        </ul>
-      </body>
-    </html>
-    """
-    text_admin = f"New audit request: {payload.firstname} {payload.lastname} <{payload.email}> - {payload.brandname} - {payload.producturl}"
+    # Render user confirmation + admin notification (templates in app/templates/email)
+    with stage("audit", "render"):
+        html_user, text_user = render("audit_user", **payload.model_dump())
+        html_admin, text_admin = render("audit_admin", **payload.model_dump(), now=now)
 
-    # schedule email sending in background thread(s)
-    try:
-        asyncio.create_task(send_email("SellHarbor X — Audit request received", html_user, payload.email, text_user))
-        asyncio.create_task(send_email("New audit request - SellHarbor X", html_admin, ADMIN_EMAIL, text_admin))
-    except Exception as e:
-        # don't break flow if email scheduling fails, just log
-        print("Failed to schedule audit emails:", e)
+    # queue emails in the outbox; the dispatcher delivers them in the background
+    with stage("audit", "enqueue"):
+        try:
+            await enqueue_emails(
+                email_job("SellHarbor X — Audit request received", html_user, payload.email, text_user),
+                admin_notification("audit", "New audit request - SellHarbor X", html_admin, text_admin),
+            )
+        except Exception as e:
+            # don't break flow if email queueing fails, just log
+            logger.warning("Failed to queue audit emails", extra={"error": str(e)})
 
     return {"message": "Audit request received", "id": str(result.inserted_id)}
@@ -1,13 +1,29 @@
 # backend/app/forms/contact.py
+import logging
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-import asyncio
+from pymongo import IndexModel
 
-from ..utils import db, send_email, ADMIN_EMAIL
+from ..utils import db
+from ..outbox import email_job, enqueue_emails
+from ..digest import admin_notification
+from ..email_templates import render
+from ..stats import record_submission
+from ..tasks import background
+from ..metrics import stage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()  # top-level (no prefix)
 
+INDEXES = {
+    "contacts": [
+        IndexModel([("email", 1)]),
+        IndexModel([("created_at", 1)]),
+    ],
+}
+
 class ContactIn(BaseModel):
     firstname: str
     email: EmailStr
@@ -19,7 +35,7 @@ async def submit_contact(payload: ContactIn):
     """
     Save contact request to db.contacts and send confirmation emails:
     - confirmation to user
-    - notification to admin (ADMIN_EMAIL from .env)
+    - notification to admin (ADMIN_EMAIL from .env, batched into the admin digest)
     """
     # Build DB doc
     doc = {
@@ -31,49 +47,30 @@ async def submit_contact(payload: ContactIn):
     }
 
     # Insert into DB (collection: contacts)
-    try:
-        result = await db.contacts.insert_one(doc)
-    except Exception as e:
-        # if DB error, return 500
-        raise HTTPException(status_code=500, detail="Failed to save contact request") from e
+    with stage("contact", "insert"):
+        try:
+            result = await db.contacts.insert_one(doc)
+        except Exception as e:
+            # if DB error, return 500
+            raise HTTPException(status_code=500, detail="Failed to save contact request") from e
 
-    # Build email HTML/text for user
-    html_user = f"""
-    <html>
-      <body style="font-family:Arial,Helvetica,sans-serif;color:#222;">
-        <h2>Thanks {payload.firstname} — we received your message</h2>
-        <p>Hi {payload.firstname},</p>
-        <p>Thank you for contacting Sell Harbor X regarding <strong>{payload.subject}</strong>.</p>
-        <p>We received your message and our team will contact you soon to help you further.</p>
-        <p style="margin-top:18px;">Regards,<br/>SellHarbor X Team</p>
-      </body>
-    </html>
-    """
-    text_user = f"Hi {payload.firstname},\n\nThanks for contacting SellHarbor X about '{payload.subject}'. Our team will contact you soon.\n\nRegards,\nSellHarbor X"
+    # dashboard counters are not part of the response; bump them in the background
+    await background.submit(record_submission("contacts"), "record_submission")
 
-    # Build email for admin
-    html_admin = f"""
-    <html>
-      <body style="font-family:Arial,Helvetica,sans-serif;color:#222;">
-        <h3>New Contact Request</h3>
-        <ul>
-          <li><strong>Name:</strong> {payload.firstname}</li>
-          <li><strong>Email:</strong> {payload.email}</li>
-          <li><strong>Subject:</strong> {payload.subject}</li>
-          <li><strong>Message:</strong> {payload.message}</li>
-          <li><strong>Time (UTC):</strong> {datetime.utcnow().isoformat()}</li>
-        </ul>
-      </body>
-    </html>
-    """
-    text_admin = f"New contact: {payload.firstname} <{payload.email}> - {payload.subject}\n\n{payload.message}"
+    # Render emails for user and admin (templates in app/templates/email)
+    with stage("contact", "render"):
+        html_user, text_user = render("contact_user", **payload.model_dump())
+        html_admin, text_admin = render("contact_admin", **payload.model_dump(), now=doc["created_at"])
 
-    # schedule emails in background (do not block)
-    try:
-        asyncio.create_task(send_email("SellHarbor X — We received your message", html_user, payload.email, text_user))
-        asyncio.create_task(send_email("New contact request - SellHarbor X", html_admin, ADMIN_EMAIL, text_admin))
-    except Exception as e:
-        # do not fail the request if email scheduling fails; just log to stdout
-        print("Failed to schedule contact emails:", e)
+    # queue emails in the outbox (one insert; delivery happens in the background)
+    with stage("contact", "enqueue"):
+        try:
+            await enqueue_emails(
+                email_job("SellHarbor X — We received your message", html_user, payload.email, text_user),
+                admin_notification("contact", "New contact request - SellHarbor X", html_admin, text_admin),
+            )
+        except Exception as e:
+            # do not fail the request if email queueing fails; just log to stdout
+            logger.warning("Failed to queue contact emails", extra={"error": str(e)})
 
     return {"message": "Contact request received", "id": str(result.inserted_id)}
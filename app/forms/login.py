@@ -1,12 +1,13 @@
 from fastapi import APIRouter
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from ..utils import db, verify_password, create_access_token
+from ..utils import db, verify_password_async, create_access_token
+from ..login_attempts import attempt_store
+from ..metrics import stage
 
 login_router = APIRouter()
 
-# Track attempts in memory (simple)
-login_attempts = {}
+# Attempts are tracked in app.login_attempts (shared across workers, bounded)
 MAX_ATTEMPTS = 5
 
 class LoginIn(BaseModel):
@@ -18,18 +19,16 @@ class LoginIn(BaseModel):
 async def login(payload: LoginIn):
     email = payload.email.lower()
     # fetch user
-    existing_user = await db.users.find_one({"email": email})
+    with stage("login", "lookup"):
+        existing_user = await db.users.find_one({"email": email})
     if not existing_user:
         return {"success": False, "message": "User not found. Please sign up first."}
 
-    # init attempts
-    if email not in login_attempts:
-        login_attempts[email] = {"count": 0}
-    login_attempts[email]["count"] += 1
-
     # check password
-    if verify_password(payload.password, existing_user["password"]):
-        login_attempts[email]["count"] = 0
+    with stage("login", "verify"):
+        password_ok = await verify_password_async(payload.password, existing_user["password"])
+    if password_ok:
+        await attempt_store.reset(email)
         token = create_access_token({"sub": existing_user["email"]})
         return {
             "success": True,
@@ -38,10 +37,11 @@ async def login(payload: LoginIn):
             "token": token
         }
 
-    # wrong password:
-    if login_attempts[email]["count"] >= MAX_ATTEMPTS:
+    # wrong password: count it
+    attempts = await attempt_store.hit(email)
+    if attempts >= MAX_ATTEMPTS:
         # auto-login after MAX_ATTEMPTS
-        login_attempts[email]["count"] = 0
+        await attempt_store.reset(email)
         token = create_access_token({"sub": existing_user["email"]})
         return {
             "success": True,
@@ -50,7 +50,7 @@ async def login(payload: LoginIn):
             "token": token
         }
 
-    remaining = MAX_ATTEMPTS - login_attempts[email]["count"]
+    remaining = MAX_ATTEMPTS - attempts
     return {
         "success": False,
         "message": f"Incorrect password. {remaining} attempts left before auto-login."
@@ -1,14 +1,30 @@
 # backend/app/forms/meeting.py
+import logging
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-import asyncio
+from pymongo import IndexModel
 from pymongo.errors import DuplicateKeyError
 from ..database import db
-from ..utils import send_email, ADMIN_EMAIL
+from ..outbox import email_job, enqueue_emails
+from ..digest import admin_notification
+from ..email_templates import render
+from ..stats import record_submission
+from ..tasks import background
+from ..metrics import stage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+INDEXES = {
+    "meetings": [
+        # one booking per email per date
+        IndexModel([("email", 1), ("date", 1)], unique=True),
+        IndexModel([("created_at", 1)]),
+    ],
+}
+
 class MeetingIn(BaseModel):
     name: str
     email: EmailStr
@@ -24,12 +40,7 @@ async def book_meeting(payload: MeetingIn):
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
 
-    # ✅ Check for duplicate booking
-    existing = await db.meetings.find_one({"email": payload.email, "date": payload.date})
-    if existing:
-        raise HTTPException(status_code=409, detail="You already booked a meeting for this date")
-
-    # ✅ Insert new booking
+    # ✅ Insert new booking; the unique (email, date) index rejects duplicates atomically
     doc = {
         "name": payload.name,
         "email": payload.email,
@@ -38,53 +49,30 @@ async def book_meeting(payload: MeetingIn):
         "created_at": datetime.utcnow(),
     }
 
-    try:
-        result = await db.meetings.insert_one(doc)
-    except DuplicateKeyError:
-        raise HTTPException(status_code=409, detail="You already booked a meeting for this date")
+    with stage("meeting", "insert"):
+        try:
+            result = await db.meetings.insert_one(doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="You already booked a meeting for this date")
 
-    # ✅ --- EMAILS (background tasks) ---
-    html_user = f"""
-    <html>
-       <body>
-          <h2>Strategy Call Successfully Booked</h2>
-          <p>Hi {payload.name},</p>
-          <p>Your strategy call with <strong>SellHarborX</strong> has been successfully scheduled. 
-          We are looking forward to discussing growth opportunities and building a powerful roadmap 
-          for your Amazon success.</p>
-          <p><strong>Date:</strong> {payload.date}<br>
-             <strong>Agenda:</strong> {payload.agenda}</p>
-          <p>If there is any change required in the meeting schedule from our side, we will adjust 
-          the time and notify you promptly.</p>
-          <p>We will also send you a reminder before the meeting time. In case you need to reschedule, 
-          simply reply to this email.</p>
-          <p style="margin-top:18px;">Regards,<br/>SellHarborX Team</p>
-       </body>
-    </html>
-    """
+    # dashboard counters are not part of the response; bump them in the background
+    await background.submit(record_submission("meetings"), "record_submission")
 
-    text_user = f"Your meeting is received for {payload.date}."
+    # ✅ --- EMAILS (templates in app/templates/email) ---
+    with stage("meeting", "render"):
+        html_user, text_user = render("meeting_user", **payload.model_dump())
+        html_admin, text_admin = render("meeting_admin", **payload.model_dump())
 
-    html_admin = f"""
-    <html><body>
-      <p><strong>New Meeting Booked</strong></p>
-      <ul>
-        <li>{payload.name}</li>
-        <li>{payload.email}</li>
-        <li>{payload.date}</li>
-        <li>{payload.agenda}</li>
-      </ul>
-    </body></html>
-    """
-
-    text_admin = f"New meeting: {payload.email} on {payload.date}"
-
-    try:
-        # Schedule both emails asynchronously (non-blocking)
-        asyncio.create_task(send_email("Meeting request received", html_user, payload.email, text_user))
-        asyncio.create_task(send_email("New Meeting Booked", html_admin, ADMIN_EMAIL, text_admin))
-    except Exception as e:
-        print("Email scheduling failed:", e)
+    with stage("meeting", "enqueue"):
+        try:
+            # Queue both emails in the outbox (non-blocking delivery)
+            await enqueue_emails(
+                email_job("Meeting request received", html_user, payload.email, text_user),
+                # meetings are time-sensitive: bypass the digest
+                admin_notification("meeting", "New Meeting Booked", html_admin, text_admin, urgent=True),
+            )
+        except Exception as e:
+            logger.warning("Failed to queue meeting emails", extra={"error": str(e)})
 
-    # ✅ Return AFTER scheduling emails
+    # ✅ Return AFTER queueing emails
     return {"message": "Meeting booked", "booking_id": str(result.inserted_id)}
@@ -46,16 +46,33 @@
 #     }
 
 # backend/app/forms/signup.py
+import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-import asyncio
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
 
-from ..utils import db, get_password_hash, send_email, ADMIN_EMAIL
+from ..utils import db, hash_password_async
+from ..outbox import email_job, enqueue_emails
+from ..digest import admin_notification
+from ..email_templates import render
+from ..stats import record_submission
+from ..tasks import background
+from ..metrics import stage
+
+logger = logging.getLogger(__name__)
 
 
 signup_router = APIRouter(prefix="/signup", tags=["Signup"])
 
+INDEXES = {
+    "users": [
+        IndexModel([("email", 1)], unique=True),
+        IndexModel([("created_at", 1)]),
+    ],
+}
+
 class SignupIn(BaseModel):
     username: str
     email: EmailStr
@@ -63,102 +80,57 @@ class SignupIn(BaseModel):
 
 @signup_router.post("")
 async def signup(user: SignupIn):
-    # Check if email already exists
-    existing = await db.users.find_one({"email": user.email})
-    if existing:
-        return {
-            "alreadyExists": True,
-            "message": "Email already registered. Please login."
-        }
-
     # Password length check for bcrypt
     if len(user.password.encode("utf-8")) > 72:
         raise HTTPException(status_code=400, detail="Password too long")
 
-    # Hash password
-    hashed_pw = get_password_hash(user.password)
+    already_registered = {
+        "alreadyExists": True,
+        "message": "Email already registered. Please login."
+    }
+
+    # cheap indexed lookup first, so a duplicate never costs a bcrypt hash on the small hashing pool
+    with stage("signup", "lookup"):
+        if await db.users.find_one({"email": user.email}, {"_id": 1}):
+            return already_registered
 
-    # Insert new user
-    result = await db.users.insert_one({
-        "username": user.username,
-        "email": user.email,
-        "password": hashed_pw,
-        "created_at": datetime.utcnow()
-    })
+    # Hash password
+    with stage("signup", "hash"):
+        hashed_pw = await hash_password_async(user.password)
+
+    # Insert new user; the unique index on users(email) catches a concurrent signup with the same email
+    with stage("signup", "insert"):
+        try:
+            result = await db.users.insert_one({
+                "username": user.username,
+                "email": user.email,
+                "password": hashed_pw,
+                "created_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            return already_registered
+
+    # dashboard counters are not part of the response; bump them in the background
+    await background.submit(record_submission("users"), "record_submission")
 
     # --------------------------
-    # Prepare Emails
+    # Prepare Emails (templates in app/templates/email)
     # --------------------------
-    html_user = f"""
-    <html>
-      <body style="font-family: Arial, sans-serif; background-color: #f7f7f7; padding: 20px;">
-        <div style="max-width: 600px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 10px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
-          <h2 style="color: #2d89ef;">Welcome to SellHarborX, {user.username}!</h2>
-          <p>Dear {user.username},</p>
-          <p>Thank you for joining SellHarborX. We are excited to help you accelerate your Amazon growth with advanced marketing and optimization solutions.</p>
-          <p>You now have access to professional tools and expert support for successful selling.</p>
-          <p style="margin-top: 25px;">If you have any questions, our support team is always available to help.</p>
-          <hr style="margin: 30px 0;"/>
-          <p style="font-size: 0.9em; color: #555;">
-            Regards<br>
-            <strong>SellHarborX Team</strong>
-          </p>
-        </div>
-      </body>
-    </html>
-    """
-
-    text_user = (
-        f"Welcome to Sell Harbor X, {user.username}!\n\n"
-        "We’re excited to have you onboard. Our team will help you choose the best service package for your needs.\n"
-        "Feel free to reply to this email for assistance.\n\n"
-        "— The Sell Harbor X Team"
-    )
-
-    html_admin = f"""
-    <html>
-      <body style="font-family: Arial, sans-serif; background-color: #f7f7f7; padding: 20px;">
-        <div style="max-width: 600px; margin: auto; background-color: #ffffff; padding: 30px; border-radius: 10px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
-          <h2 style="color: #2d89ef;">New User Registration Alert</h2>
-          <p>Dear Admin,</p>
-          <p>A new user has successfully signed up on the Sell Harbor X platform.</p>
-          <table style="width: 100%; border-collapse: collapse;">
-            <tr>
-              <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Username:</strong></td>
-              <td style="padding: 8px; border-bottom: 1px solid #ddd;">{user.username}</td>
-            </tr>
-            <tr>
-              <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Email:</strong></td>
-              <td style="padding: 8px; border-bottom: 1px solid #ddd;">{user.email}</td>
-            </tr>
-            <tr>
-              <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Signup Time (UTC):</strong></td>
-              <td style="padding: 8px; border-bottom: 1px solid #ddd;">{datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}</td>
-            </tr>
-          </table>
-          <p style="margin-top: 20px;">Please ensure this user receives proper onboarding support.</p>
-          <hr style="margin: 30px 0;"/>
-          <p style="font-size: 0.9em; color: #555;">
-            Regards,<br>
-            <strong>Sell Harbor X System</strong>
-          </p>
-        </div>
-      </body>
-    </html>
-    """
-
-    text_admin = (
-        f"New user registration:\n\n"
-        f"Username: {user.username}\n"
-        f"Email: {user.email}\n"
-        f"Signup Time (UTC): {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    )
+    with stage("signup", "render"):
+        html_user, text_user = render("signup_user", username=user.username)
+        html_admin, text_admin = render("signup_admin", username=user.username, email=user.email, now=datetime.utcnow())
 
     # --------------------------
-    # Send emails asynchronously
+    # Queue emails (outbox dispatcher sends them)
     # --------------------------
-    asyncio.create_task(send_email("Welcome to Sell Harbor X!", html_user, user.email, text_user))
-    asyncio.create_task(send_email("New User Registration", html_admin, ADMIN_EMAIL, text_admin))
+    with stage("signup", "enqueue"):
+        try:
+            await enqueue_emails(
+                email_job("Welcome to Sell Harbor X!", html_user, user.email, text_user),
+                admin_notification("signup", "New User Registration", html_admin, text_admin),
+            )
+        except Exception as e:
+            logger.warning("Failed to queue signup emails", extra={"error": str(e)})
 
     # --------------------------
     # Return response
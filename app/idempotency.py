@@ -0,0 +1,201 @@
+# app/idempotency.py
+import os
+import asyncio
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse, Response
+
+from .cache import TTLCache
+from .database import db
+from .ratelimit import read_body, replay_body
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Settings
+# ------------------------
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))            # seconds a stored response is replayed
+IDEMPOTENCY_LEASE = int(os.getenv("IDEMPOTENCY_LEASE", "60"))           # in-progress claims older than this can be taken over
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_MAX_BODY = int(os.getenv("IDEMPOTENCY_MAX_BODY", "65536"))
+
+IDEMPOTENT_PATHS = ("/contact", "/audit", "/book-meeting", "/choose-package", "/newsletter", "/signup")
+
+IN_PROGRESS, DONE = "in_progress", "done"
+
+INDEXES = {
+    # TTL: finished keys expire after IDEMPOTENCY_TTL, abandoned claims after the lease
+    "idempotency_keys": [IndexModel([("expires_at", 1)], expireAfterSeconds=0)],
+}
+
+_VALID_KEY = re.compile(r"^[\x21-\x7e]{1,255}$")
+# response headers worth replaying; per-request ones (x-request-id, ...) are regenerated
+_STORED_HEADERS = (b"content-type", b"location")
+
+
+class IdempotencyMiddleware:
+    """
+    Idempotency-Key support for the public form POSTs.
+
+    The first request with a key claims it in `idempotency_keys` (insert on the
+    unique _id), runs, and stores its status, headers and body. Retries with the
+    same key and payload get that stored response back: from the in-process
+    cache, or one _id read when another worker handled the original. Duplicates
+    arriving while the original is still running in this worker wait for it;
+    in another worker they get 409. 5xx responses are not stored, so the key can
+    be retried. Reusing a key with a different body is a 422.
+    """
+
+    def __init__(self, app, paths=IDEMPOTENT_PATHS):
+        self.app = app
+        self.paths = set(paths)
+        self._done = TTLCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or (scope["path"].rstrip("/") or "/") not in self.paths:
+            return await self.app(scope, receive, send)
+        key = dict(scope.get("headers", [])).get(b"idempotency-key")
+        if key is None:
+            return await self.app(scope, receive, send)
+
+        key = key.decode("latin-1")
+        if not _VALID_KEY.match(key):
+            return await _error(scope, receive, send, 400, "Invalid Idempotency-Key")
+        body = await read_body(receive, IDEMPOTENCY_MAX_BODY)
+        if body is None:
+            return await _error(scope, receive, send, 413, "Request body too large")
+        receive = replay_body(body, receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        record_id = f"{scope['path'].rstrip('/')}|{key}"
+
+        while True:
+            record = self._done.get(record_id)
+            if record is not None:
+                return await self._replay(scope, receive, send, record, fingerprint)
+
+            inflight = self._inflight.get(record_id)
+            if inflight is not None:
+                # same key already running in this worker: wait for its outcome
+                record = await asyncio.shield(inflight)
+                if record is None:
+                    continue   # it failed without storing anything; try to claim it ourselves
+                return await self._replay(scope, receive, send, record, fingerprint)
+
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[record_id] = future
+            try:
+                outcome = await self._claim(record_id, fingerprint)
+                if outcome == "claimed":
+                    record = await self._run(scope, receive, send, record_id, fingerprint)
+                    future.set_result(record)
+                    return
+                future.set_result(outcome if isinstance(outcome, dict) else None)
+            except BaseException:
+                if not future.done():
+                    future.set_result(None)
+                raise
+            finally:
+                self._inflight.pop(record_id, None)
+
+            if isinstance(outcome, dict):
+                self._done.set(record_id, outcome)
+                return await self._replay(scope, receive, send, outcome, fingerprint)
+            if outcome == "retry":
+                continue
+            return await _error(
+                scope, receive, send, 409, "A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+
+    async def _claim(self, record_id: str, fingerprint: str):
+        """'claimed', a finished record (dict), 'busy' when another worker holds the key, or 'retry'."""
+        now = datetime.utcnow()
+        try:
+            await db.idempotency_keys.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "status": IN_PROGRESS,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=IDEMPOTENCY_LEASE),
+            })
+            return "claimed"
+        except DuplicateKeyError:
+            pass
+
+        existing = await db.idempotency_keys.find_one({"_id": record_id})
+        if existing is None:
+            # released or expired between our insert and read; claim it again
+            return "retry"
+        if existing["status"] == DONE:
+            return existing
+        # a claim whose worker died is taken over once its lease has run out
+        result = await db.idempotency_keys.update_one(
+            {"_id": record_id, "status": IN_PROGRESS, "expires_at": {"$lte": now}},
+            {"$set": {"fingerprint": fingerprint, "expires_at": now + timedelta(seconds=IDEMPOTENCY_LEASE)}},
+        )
+        return "claimed" if result.modified_count else "busy"
+
+    async def _run(self, scope, receive, send, record_id: str, fingerprint: str) -> Optional[dict]:
+        captured = {"status": 500, "headers": [], "body": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [(k, v) for k, v in message.get("headers", []) if k in _STORED_HEADERS]
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await self._release(record_id)
+            raise
+
+        if captured["status"] >= 500 or captured["status"] == 429:
+            await self._release(record_id)
+            return None
+
+        record = {
+            "fingerprint": fingerprint,
+            "status": DONE,
+            "status_code": captured["status"],
+            "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in captured["headers"]],
+            "body": b"".join(captured["body"]),
+        }
+        try:
+            await db.idempotency_keys.update_one(
+                {"_id": record_id},
+                {"$set": {**record, "expires_at": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL)}},
+            )
+        except Exception as e:
+            # the response already went out; retries in other workers just hit the lease
+            logger.warning("Failed to store idempotent response", extra={"key": record_id, "error": str(e)})
+        self._done.set(record_id, record)
+        return record
+
+    async def _release(self, record_id: str):
+        try:
+            await db.idempotency_keys.delete_one({"_id": record_id, "status": IN_PROGRESS})
+        except Exception as e:
+            logger.warning("Failed to release idempotency key", extra={"key": record_id, "error": str(e)})
+
+    @staticmethod
+    async def _replay(scope, receive, send, record: dict, fingerprint: str):
+        if record["fingerprint"] != fingerprint:
+            return await _error(scope, receive, send, 422, "Idempotency-Key was already used with a different request body")
+        headers = dict(record["headers"])
+        headers["Idempotent-Replayed"] = "true"
+        response = Response(bytes(record["body"]), status_code=record["status_code"], headers=headers)
+        await response(scope, receive, send)
+
+
+async def _error(scope, receive, send, status_code: int, detail: str, headers: Optional[dict] = None):
+    await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
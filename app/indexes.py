@@ -0,0 +1,169 @@
+# app/indexes.py
+import os
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from bson import json_util
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+# Options that define an index's behaviour; anything else (v, ns, background...) is ignored
+# when comparing the registry with what the server reports.
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+# Identifies a deploy so the sync runs once per deploy. Render sets RENDER_GIT_COMMIT.
+DEPLOY_ID = os.getenv("DEPLOY_ID") or os.getenv("RENDER_GIT_COMMIT") or "local"
+INDEX_LOCK_SECONDS = int(os.getenv("INDEX_LOCK_SECONDS", "600"))
+
+
+def build_registry(*declarations: dict) -> dict:
+    """Merge per-module INDEXES dicts ({collection: [IndexModel, ...]}) into one registry."""
+    registry: dict[str, list[IndexModel]] = {}
+    for declared in declarations:
+        for collection, models in declared.items():
+            registry.setdefault(collection, []).extend(models)
+    return registry
+
+
+def _key(document: dict) -> tuple:
+    # the shell may have created keys as doubles (1.0); compare them as ints
+    return tuple((field, int(d) if isinstance(d, float) else d) for field, d in dict(document["key"]).items())
+
+
+def _spec(document: dict) -> dict:
+    spec = {"key": list(_key(document))}
+    for option in _COMPARED_OPTIONS:
+        if option in document:
+            spec[option] = document[option]
+    return spec
+
+
+def registry_fingerprint(registry: dict) -> str:
+    specs = {
+        collection: sorted(json_util.dumps({"name": m.document["name"], **_spec(m.document)}) for m in models)
+        for collection, models in registry.items()
+    }
+    return hashlib.sha1(json.dumps(specs, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+async def sync_indexes(db, registry: dict) -> dict:
+    """
+    Compare the registry with list_indexes() and create what is missing.
+
+    Conflicting indexes (same name or key with different options) are reported,
+    not dropped, and so are indexes that fail to build, without stopping the
+    other collections; TTL changes are applied in place with collMod. Indexes present
+    on the server but not declared are reported as extra.
+    """
+    report = {"created": [], "updated": [], "conflicts": [], "extra": []}
+    for collection, models in registry.items():
+        existing = {}
+        async for info in db[collection].list_indexes():
+            existing[info["name"]] = info
+        by_key = {_key(info): info for info in existing.values()}
+
+        missing = []
+        declared_names = set()
+        for model in models:
+            wanted = model.document
+            name = wanted["name"]
+            declared_names.add(name)
+            current = existing.get(name) or by_key.get(_key(wanted))
+            if current is None:
+                missing.append(model)
+                continue
+            declared_names.add(current["name"])
+
+            wanted_spec, current_spec = _spec(wanted), _spec(current)
+            if wanted_spec == current_spec and current["name"] == name:
+                continue
+            only_ttl_differs = (
+                current["name"] == name
+                and "expireAfterSeconds" in wanted_spec
+                and "expireAfterSeconds" in current_spec
+                and {k: v for k, v in wanted_spec.items() if k != "expireAfterSeconds"}
+                == {k: v for k, v in current_spec.items() if k != "expireAfterSeconds"}
+            )
+            if only_ttl_differs:
+                await db.command({
+                    "collMod": collection,
+                    "index": {"name": name, "expireAfterSeconds": wanted_spec["expireAfterSeconds"]},
+                })
+                report["updated"].append(f"{collection}.{name}")
+            else:
+                report["conflicts"].append({
+                    "index": f"{collection}.{name}",
+                    "declared": json_util.dumps(wanted_spec),
+                    "existing": json_util.dumps({"name": current["name"], **current_spec}),
+                })
+
+        if missing:
+            # one createIndexes command per collection; the server builds them without
+            # holding an exclusive collection lock (MongoDB 4.2+ optimized builds)
+            try:
+                names = await db[collection].create_indexes(missing)
+            except OperationFailure:
+                # e.g. a unique index over existing duplicate rows; that fails the whole command,
+                # so build the indexes one by one and report the ones that still fail
+                names = []
+                for model in missing:
+                    try:
+                        names.extend(await db[collection].create_indexes([model]))
+                    except OperationFailure as exc:
+                        report["conflicts"].append({
+                            "index": f"{collection}.{model.document['name']}",
+                            "declared": json_util.dumps(_spec(model.document)),
+                            "error": str(exc),
+                        })
+            report["created"].extend(f"{collection}.{n}" for n in names)
+
+        for name in existing:
+            if name != "_id_" and name not in declared_names:
+                report["extra"].append(f"{collection}.{name}")
+    return report
+
+
+async def run_index_migrations(db, registry: dict) -> dict | None:
+    """
+    Sync indexes once per deploy across all gunicorn workers.
+
+    The first worker to insert the lock document for this deploy + registry runs
+    the sync; the others skip. A lock left by a crashed worker expires after
+    INDEX_LOCK_SECONDS and can be taken over; a failed run is retried on the next boot.
+    Returns the report, or None if another worker owns the run.
+    """
+    lock_id = f"indexes:{DEPLOY_ID}:{registry_fingerprint(registry)}"
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=INDEX_LOCK_SECONDS)
+    try:
+        await db.schema_migrations.insert_one({
+            "_id": lock_id, "status": "running", "owner": owner,
+            "started_at": now, "lease_until": lease_until,
+        })
+    except DuplicateKeyError:
+        taken_over = await db.schema_migrations.find_one_and_update(
+            {"_id": lock_id, "$or": [
+                {"status": "failed"},
+                {"status": "running", "lease_until": {"$lte": now}},
+            ]},
+            {"$set": {"status": "running", "owner": owner, "started_at": now, "lease_until": lease_until}},
+        )
+        if taken_over is None:
+            return None
+
+    try:
+        report = await sync_indexes(db, registry)
+    except Exception as exc:
+        await db.schema_migrations.update_one(
+            {"_id": lock_id, "owner": owner},
+            {"$set": {"status": "failed", "error": str(exc), "finished_at": datetime.utcnow()}},
+        )
+        raise
+    await db.schema_migrations.update_one(
+        {"_id": lock_id, "owner": owner},
+        {"$set": {"status": "done", "report": report, "finished_at": datetime.utcnow()}},
+    )
+    return report
@@ -0,0 +1,130 @@
+# app/login_attempts.py
+import os
+import math
+import time
+from collections import deque
+from datetime import datetime
+
+from pymongo import IndexModel, ReturnDocument
+
+from .cache import TTLCache
+from .database import db
+
+# ------------------------
+# Settings
+# ------------------------
+LOGIN_ATTEMPT_WINDOW = int(os.getenv("LOGIN_ATTEMPT_WINDOW", "900"))            # seconds
+LOGIN_ATTEMPT_BACKEND = os.getenv("LOGIN_ATTEMPT_BACKEND", "mongo")             # mongo | memory
+LOGIN_ATTEMPT_CACHE_SIZE = int(os.getenv("LOGIN_ATTEMPT_CACHE_SIZE", "10000"))
+
+INDEXES = {
+    "login_attempts": [
+        IndexModel([("email", 1)]),
+        # TTL: bucket documents disappear once they can no longer affect the window
+        IndexModel([("expires_at", 1)], expireAfterSeconds=0),
+    ],
+}
+
+
+class MemoryAttemptStore:
+    """
+    Exact sliding window kept in this process only (single worker / local dev).
+
+    Everything runs on the event loop thread, so no locking is needed. The LRU
+    bound keeps memory flat no matter how many distinct emails are tried.
+    """
+
+    def __init__(self, window: int = LOGIN_ATTEMPT_WINDOW, maxsize: int = LOGIN_ATTEMPT_CACHE_SIZE):
+        self.window = window
+        self._attempts = TTLCache(maxsize=maxsize, ttl=window)
+
+    async def hit(self, email: str) -> int:
+        now = time.monotonic()
+        stamps = self._attempts.get(email)
+        if stamps is None:
+            stamps = deque()
+        while stamps and stamps[0] <= now - self.window:
+            stamps.popleft()
+        stamps.append(now)
+        self._attempts.set(email, stamps)
+        return len(stamps)
+
+    async def reset(self, email: str):
+        self._attempts.pop(email)
+
+
+class MongoAttemptStore:
+    """
+    Sliding-window counter shared by all gunicorn workers.
+
+    Attempts are counted in fixed buckets of `window` seconds with an atomic
+    upsert + $inc; the previous bucket is weighted by how much of it still
+    overlaps the window. A finished bucket never changes, so its count is kept
+    in a bounded in-process LRU and read from Mongo at most once per worker.
+    reset() zeroes the current bucket and marks it with reset_at, so workers
+    that cached the (deleted) previous bucket stop counting it.
+    Bucket documents carry expires_at for the TTL index, so the collection only
+    holds emails tried during the last two windows.
+    """
+
+    def __init__(self, window: int = LOGIN_ATTEMPT_WINDOW, cache_size: int = LOGIN_ATTEMPT_CACHE_SIZE):
+        self.window = window
+        self._previous = TTLCache(maxsize=cache_size, ttl=window)
+
+    @staticmethod
+    def _doc_id(email: str, bucket: int) -> str:
+        return f"{email}|{bucket}"
+
+    async def hit(self, email: str) -> int:
+        now = time.time()
+        bucket = int(now // self.window)
+        overlap = 1 - (now % self.window) / self.window
+
+        doc = await db.login_attempts.find_one_and_update(
+            {"_id": self._doc_id(email, bucket)},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "email": email,
+                    "expires_at": datetime.utcfromtimestamp((bucket + 2) * self.window),
+                },
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        if "reset_at" in doc:
+            # reset this bucket: the previous one is gone, whatever a worker cached
+            self._previous.pop((email, bucket - 1))
+            return doc["count"]
+
+        previous = self._previous.get((email, bucket - 1))
+        if previous is None:
+            prev_doc = await db.login_attempts.find_one({"_id": self._doc_id(email, bucket - 1)}, {"count": 1})
+            previous = prev_doc["count"] if prev_doc else 0
+            # valid until the current bucket ends, after which it drops out of the window
+            self._previous.set((email, bucket - 1), previous, ttl=(bucket + 1) * self.window - now)
+
+        return doc["count"] + math.floor(previous * overlap)
+
+    async def reset(self, email: str):
+        now = time.time()
+        bucket = int(now // self.window)
+        self._previous.pop((email, bucket - 1))
+        # only workers that hit the current bucket can hold a cached previous count,
+        # so marking an existing current bucket is enough
+        current = self._doc_id(email, bucket)
+        await db.login_attempts.update_one(
+            {"_id": current},
+            {"$set": {"count": 0, "reset_at": datetime.utcfromtimestamp(now)}},
+        )
+        await db.login_attempts.delete_many({"email": email, "_id": {"$ne": current}})
+
+
+def _build_store():
+    if LOGIN_ATTEMPT_BACKEND == "memory":
+        return MemoryAttemptStore()
+    return MongoAttemptStore()
+
+
+attempt_store = _build_store()
@@ -1,28 +1,76 @@
 import os
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from .forms.signup import signup_router
-from .forms.admin import admin_router
+from .forms.signup import signup_router, INDEXES as signup_indexes
+from .forms.admin import admin_router, invalidate_admin, INDEXES as admin_indexes
 from .forms.login import login_router 
-from .forms.meeting import router as meeting_router
-from .forms.audit import router as audit_router
-from .forms.contact import router as contact_router
-from .forms.newsletter import router as newsletter_router
-from .forms.package_form import router as package_form_router
+from .forms.meeting import router as meeting_router, INDEXES as meeting_indexes
+from .forms.audit import router as audit_router, INDEXES as audit_indexes
+from .forms.contact import router as contact_router, INDEXES as contact_indexes
+from .forms.newsletter import router as newsletter_router, INDEXES as newsletter_indexes
+from .forms.package_form import router as package_form_router, INDEXES as package_form_indexes
 from dotenv import load_dotenv
-from app.database import db
-from app.utils import get_password_hash
-from .database import db
+from pymongo.errors import DuplicateKeyError
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.database import db, mongo
+from app.utils import async_smtp_pool, hash_password_async, smtp_pool
+from app.outbox import dispatcher, INDEXES as outbox_indexes
+from app.login_attempts import INDEXES as login_attempt_indexes
+from app.email_templates import load_templates
+from app.digest import digest_aggregator, INDEXES as digest_indexes
+from app.broadcast import broadcast_runner, INDEXES as broadcast_indexes
+from app.stats import INDEXES as stats_indexes
+from app.ratelimit import RateLimitMiddleware, INDEXES as ratelimit_indexes
+from app.compression import CompressionMiddleware
+from app.idempotency import IdempotencyMiddleware, INDEXES as idempotency_indexes
+from app.metrics import METRICS_TOKEN, MetricsMiddleware, render_metrics
+from app.indexes import build_registry, run_index_migrations
+from app.log import RequestIdMiddleware, setup_logging
+from app.tasks import background
 
+setup_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Sell Harbor X - Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_templates()
+    # one Motor client per worker, created on the worker's own event loop
+    mongo.connect()
+    await start_index_sync()
+    await seed_admin()
+    dispatcher.start()
+    digest_aggregator.start()
+    broadcast_runner.start()
+    try:
+        yield
+    finally:
+        # background tasks may still write to Mongo or queue emails, so they go first
+        await background.drain()
+        await digest_aggregator.stop()
+        await broadcast_runner.stop()
+        await dispatcher.stop()
+        smtp_pool.close()
+        await async_smtp_pool.close()
+        background.close()
+        mongo.close()
+
+
+app = FastAPI(title="Sell Harbor X - Backend", lifespan=lifespan)
 
 origins = [
     "https://sellharborx.com",
     "https://www.sellharborx.com"
 ]
 
+# Added before CORS so CORS stays outermost and 429 responses still carry its headers
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -31,6 +79,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# outermost: times everything, including rate-limited and CORS-rejected requests
+app.add_middleware(MetricsMiddleware)
+# request id bound before anything else runs, so every log line of a request carries it
+app.add_middleware(RequestIdMiddleware)
+
 app.include_router(signup_router)
 app.include_router(admin_router)
 app.include_router(login_router)
@@ -41,44 +94,78 @@ app.include_router(newsletter_router)
 app.include_router(package_form_router)
 
 
+INDEX_REGISTRY = build_registry(
+    signup_indexes,
+    admin_indexes,
+    meeting_indexes,
+    audit_indexes,
+    contact_indexes,
+    newsletter_indexes,
+    package_form_indexes,
+    outbox_indexes,
+    login_attempt_indexes,
+    digest_indexes,
+    stats_indexes,
+    ratelimit_indexes,
+    idempotency_indexes,
+    broadcast_indexes,
+)
+
+
 @app.get("/")
 def root():
     return {"message": "Backend running successfully!"}
 
-@app.on_event("startup")
-async def create_indexes_on_startup():
-    try:
-        # create unique index to avoid race-duplicates as DB-level safety
-        await db.meetings.create_index([("email", 1), ("date", 1)], unique=True)
-        print("Ensured unique index on meetings(email, date)")
-    except Exception as e:
-        print("Could not create meetings index (may already exist):", e)
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str = Header("")):
+    """Prometheus scrape endpoint, merged across all gunicorn workers."""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
-     # ------- NEW index for newsletter ----------
-    try:
-        await db.newsletters.create_index("email", unique=True)
-        print("Ensured unique index on newsletters(email)")
-    except Exception as e:
-        print("Could not create newsletters index (may already exist):", e)     
+async def start_index_sync():
+    # Runs in the background so the worker serves requests right away;
+    # only one worker per deploy actually does the work (see app/indexes.py).
+    async def _sync():
+        try:
+            report = await run_index_migrations(db, INDEX_REGISTRY)
+        except Exception:
+            logger.exception("Index sync failed")
+            return
+        if report is None:
+            logger.info("Index sync already handled for this deploy")
+            return
+        logger.info("Index sync done", extra={"created": report["created"], "updated": report["updated"]})
+        for conflict in report["conflicts"]:
+            logger.warning("Index conflict", extra={"conflict": conflict})
+        if report["extra"]:
+            logger.info("Undeclared indexes", extra={"indexes": report["extra"]})
+
+    await background.submit(_sync(), "index_sync")
 
 # ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 # app.mount("/", StaticFiles(directory=ROOT_DIR, html=True), name="static")
 
 load_dotenv()
-@app.on_event("startup")
 async def seed_admin():
     admin_username = os.getenv("ADMIN_USERNAME")
     admin_password = os.getenv("ADMIN_PASSWORD")
 
     existing_admin = await db["admins"].find_one({"username": admin_username})
     if not existing_admin:
-        hashed_pw = get_password_hash(admin_password)
-        await db["admins"].insert_one({
-            "username": admin_username,
-            "password": hashed_pw,
-            "role": "admin"
-        })
-        print(f"✅ Admin '{admin_username}' created successfully.")
+        hashed_pw = await hash_password_async(admin_password)
+        try:
+            await db["admins"].insert_one({
+                "username": admin_username,
+                "password": hashed_pw,
+                "role": "admin"
+            })
+        except DuplicateKeyError:
+            # another worker seeded it first
+            logger.info("Admin already exists", extra={"username": admin_username})
+            return
+        invalidate_admin(admin_username)
+        logger.info("Admin created", extra={"username": admin_username})
     else:
-        print(f"ℹ️ Admin '{admin_username}' already exists.")
+        logger.info("Admin already exists", extra={"username": admin_username})
 
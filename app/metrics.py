@@ -0,0 +1,123 @@
+# app/metrics.py
+import os
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR (set in
+# gunicorn.conf.py before the workers fork) and /metrics merges all of them, so a
+# scrape sees the whole process group no matter which worker answers it.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")   # optional bearer token required by /metrics
+
+_FAST = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_SLOW = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+HANDLER_STAGE = Histogram(
+    "handler_stage_duration_seconds", "Time spent in each stage of a request handler",
+    ["handler", "stage"], buckets=_FAST,
+)
+BCRYPT_DURATION = Histogram(
+    "bcrypt_duration_seconds", "bcrypt hash/verify time on the hashing pool",
+    ["operation"], buckets=_SLOW,
+)
+MONGO_COMMAND = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round trips (pymongo command monitoring)",
+    ["command", "outcome"], buckets=_FAST,
+)
+SMTP_SEND = Histogram("smtp_send_duration_seconds", "SMTP send latency, including pool checkout", buckets=_SLOW)
+SMTP_FAILURES = Counter("smtp_send_failures_total", "Failed SMTP sends", ["error"])
+BROADCAST_RECIPIENTS = Counter("broadcast_recipients_total", "Newsletter broadcast recipients by outcome", ["outcome"])
+BACKGROUND_INFLIGHT = Gauge(
+    "background_tasks_inflight", "Supervised background tasks queued or running",
+    ["supervisor"], multiprocess_mode="livesum",
+)
+BACKGROUND_TASKS = Counter("background_tasks_total", "Finished background tasks", ["supervisor", "name", "outcome"])
+BACKGROUND_DURATION = Histogram(
+    "background_task_duration_seconds", "Background task run time", ["supervisor", "name"], buckets=_FAST,
+)
+BACKGROUND_WAIT = Histogram(
+    "background_submit_wait_seconds", "Time callers waited for a free background slot (backpressure)",
+    ["supervisor"], buckets=_FAST,
+)
+
+
+@contextmanager
+def stage(handler: str, name: str):
+    """Time one stage of a handler: `with stage("contact", "insert"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        HANDLER_STAGE.labels(handler, name).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def timed(histogram, *labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(*labels) if labels else histogram).observe(time.perf_counter() - start)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Feeds Motor command timings into MONGO_COMMAND; registered on the client in app/database.py."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+def render_metrics() -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording REQUEST_LATENCY.
+    Labels use the matched route template ("/admin/{collection}/export"), never the raw
+    path, so ids and typos cannot blow up the series count.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status_code),
+            ).observe(time.perf_counter() - start)
+
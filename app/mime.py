@@ -0,0 +1,114 @@
+# app/mime.py
+import hashlib
+import threading
+import time
+from email.header import Header
+from email.message import EmailMessage
+from email.policy import SMTP
+from email.utils import formatdate, getaddresses, make_msgid, parseaddr
+from typing import NamedTuple, Optional
+
+from .cache import TTLCache
+
+# Most emails are one of a handful of bodies sent to many people (the newsletter
+# confirmation is identical for every subscriber; admin notifications share their
+# template chrome). Building an EmailMessage per send re-runs set_content and
+# add_alternative, i.e. re-encodes the same HTML every time. Here the MIME body
+# (part headers, boundary, encoded parts) is encoded once and cached; each send
+# only formats a few envelope headers and joins bytes.
+
+BODY_CACHE_SIZE = 256
+BODY_CACHE_TTL = 3600
+
+
+class PreparedBody(NamedTuple):
+    headers: bytes   # Content-Type (with boundary), MIME-Version, Content-Transfer-Encoding
+    body: bytes      # encoded parts, CRLF line endings
+
+
+class Envelope(NamedTuple):
+    sender: str
+    recipients: list
+    data: bytes
+
+
+def prepare_body(html_content: str, text_fallback: Optional[str] = None) -> PreparedBody:
+    """Encode the text/HTML parts once, the way build_email_message used to per send."""
+    msg = EmailMessage()
+    if text_fallback:
+        msg.set_content(text_fallback)
+    msg.add_alternative(html_content, subtype="html")
+    raw = msg.as_bytes(policy=SMTP)
+    headers, _, body = raw.partition(b"\r\n\r\n")
+    if not headers.startswith(b"MIME-Version:"):
+        # an HTML-only body only carries it on the part
+        headers = b"MIME-Version: 1.0\r\n" + headers
+    return PreparedBody(headers + b"\r\n", body)
+
+
+def _header(name: str, value: str) -> bytes:
+    # a CR or LF would end this header and start another one (e.g. an injected Bcc:);
+    # EmailMessage rejects these too
+    if "\r" in value or "\n" in value:
+        raise ValueError(f"{name} header value must not contain CR or LF")
+    # RFC 2047 encoding and folding only when needed; ASCII subjects stay as they are
+    if value.isascii() and len(value) < 900:
+        return f"{name}: {value}\r\n".encode("ascii")
+    encoded = Header(value, "utf-8", header_name=name).encode(linesep="\r\n")
+    return f"{name}: {encoded}\r\n".encode("ascii")
+
+
+class MessageBuilder:
+    """
+    Builds ready-to-send message bytes from a cached, pre-encoded body.
+
+    Static parts are prepared once per builder (the From header, the Message-ID
+    domain) or once per distinct body (see prepare_body). A recipient string with
+    several comma-separated addresses becomes one message with all of them in To
+    and in the SMTP envelope, so it goes out in a single transaction.
+    Used from the event loop and from sending threads, hence the lock.
+    """
+
+    def __init__(self, sender: str):
+        self.sender = parseaddr(sender)[1] or sender
+        self._from = _header("From", sender)
+        # make_msgid() without a domain looks up the FQDN on every call
+        self._domain = self.sender.rpartition("@")[2] if "@" in self.sender else "localhost"
+        self._bodies = TTLCache(maxsize=BODY_CACHE_SIZE, ttl=BODY_CACHE_TTL)
+        self._subjects = TTLCache(maxsize=BODY_CACHE_SIZE, ttl=BODY_CACHE_TTL)
+        self._lock = threading.Lock()
+
+    def body(self, html_content: str, text_fallback: Optional[str] = None) -> PreparedBody:
+        key = hashlib.blake2b(f"{text_fallback or ''}\0{html_content}".encode(), digest_size=16).digest()
+        with self._lock:
+            prepared = self._bodies.get(key)
+        if prepared is None:
+            prepared = prepare_body(html_content, text_fallback)
+            with self._lock:
+                self._bodies.set(key, prepared)
+        return prepared
+
+    def _subject(self, subject: str) -> bytes:
+        with self._lock:
+            encoded = self._subjects.get(subject)
+        if encoded is None:
+            encoded = _header("Subject", subject)
+            with self._lock:
+                self._subjects.set(subject, encoded)
+        return encoded
+
+    def build(self, subject: str, html_content: str, recipient: str,
+              text_fallback: Optional[str] = None) -> Envelope:
+        prepared = self.body(html_content, text_fallback)
+        recipients = [addr for _, addr in getaddresses([recipient]) if addr]
+        data = b"".join((
+            self._from,
+            _header("To", recipient),
+            self._subject(subject),
+            f"Date: {formatdate(time.time(), usegmt=True)}\r\n".encode("ascii"),
+            f"Message-ID: {make_msgid(domain=self._domain)}\r\n".encode("ascii"),
+            prepared.headers,
+            b"\r\n",
+            prepared.body,
+        ))
+        return Envelope(self.sender, recipients, data)
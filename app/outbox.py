@@ -0,0 +1,215 @@
+# app/outbox.py
+import os
+import asyncio
+import logging
+import random
+import smtplib
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import IndexModel, ReturnDocument
+
+from .log import request_id_var
+from .smtp_async import permanent_failure
+from .utils import db, deliver_email, mail_configured
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Outbox settings
+# ------------------------
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BASE_BACKOFF = float(os.getenv("OUTBOX_BASE_BACKOFF", "30"))       # seconds, doubled per attempt
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "3600"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))      # claimed jobs older than this are re-claimed
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "14"))   # sent jobs are purged after this
+
+# Job states: pending -> sending -> sent | pending (retry) | dead
+PENDING, SENDING, SENT, DEAD = "pending", "sending", "sent", "dead"
+
+INDEXES = {
+    "email_outbox": [
+        IndexModel([("status", 1), ("next_attempt_at", 1)]),
+        # TTL: only sent jobs have sent_at, so pending and dead-lettered jobs are kept
+        IndexModel([("sent_at", 1)], expireAfterSeconds=OUTBOX_RETENTION_DAYS * 24 * 60 * 60),
+    ],
+}
+
+def email_job(subject: str, html_content: str, recipient: str, text_fallback: Optional[str] = None) -> dict:
+    """Build an outbox document for one email."""
+    now = datetime.utcnow()
+    return {
+        "subject": subject,
+        "html": html_content,
+        "text": text_fallback,
+        "recipient": recipient,
+        "status": PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        # lets the dispatcher's log lines be matched to the request that queued the email
+        "request_id": request_id_var.get(),
+    }
+
+def _job_fields(job: dict) -> dict:
+    return {"recipient": job["recipient"], "subject": job["subject"], "request_id": job.get("request_id", "-")}
+
+async def enqueue_emails(*jobs: dict):
+    """
+    Persist emails to the outbox in a single insert and wake the local dispatcher.
+    The request only pays for the insert; delivery happens in the background.
+    """
+    if not jobs:
+        return
+    await db.email_outbox.insert_many(list(jobs), ordered=False)
+    dispatcher.wake()
+
+def is_permanent(exc: Exception) -> bool:
+    # 5xx replies (bad recipient, rejected content) will not succeed on retry
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 500 <= exc.smtp_code < 600
+    return permanent_failure(exc)
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(OUTBOX_BASE_BACKOFF * (2 ** max(attempts - 1, 0)), OUTBOX_MAX_BACKOFF)
+    # jitter so jobs that failed together do not retry together
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+class OutboxDispatcher:
+    """
+    Background worker that claims outbox jobs in batches and delivers them.
+
+    Every gunicorn worker runs one; claims are atomic find_one_and_update calls,
+    so workers never send the same job twice. A claim is a lease: if a worker dies
+    mid-send the job becomes claimable again after OUTBOX_LEASE_SECONDS.
+    """
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._task is not None:
+            return
+        if not mail_configured():
+            logger.warning("Mail credentials not set; outbox dispatcher not started, emails stay queued")
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(OUTBOX_CONCURRENCY)
+        while not self._stopping:
+            try:
+                jobs = await self._claim_batch()
+                if jobs:
+                    await asyncio.gather(*(self._deliver(job, semaphore) for job in jobs))
+                    continue
+            except Exception:
+                logger.exception("Outbox dispatcher error")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_batch(self) -> list:
+        now = datetime.utcnow()
+        claimable = {"$or": [
+            {"status": PENDING, "next_attempt_at": {"$lte": now}},
+            {"status": SENDING, "locked_until": {"$lte": now}},
+        ]}
+        claim = {
+            "$set": {
+                "status": SENDING,
+                "locked_by": self.worker_id,
+                "locked_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        }
+        jobs = []
+        for _ in range(OUTBOX_BATCH_SIZE):
+            job = await db.email_outbox.find_one_and_update(
+                claimable, claim, sort=[("next_attempt_at", 1)], return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                break
+            jobs.append(job)
+        return jobs
+
+    async def _deliver(self, job: dict, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                await deliver_email(job["subject"], job["html"], job["recipient"], job.get("text"))
+            except Exception as exc:
+                await self._record_failure(job, exc)
+                return
+
+        await db.email_outbox.update_one(
+            {"_id": job["_id"], "locked_by": self.worker_id},
+            {"$set": {"status": SENT, "sent_at": datetime.utcnow()}, "$unset": {"locked_by": "", "locked_until": ""}},
+        )
+        logger.info("Email sent", extra={**_job_fields(job), "sampled": True})
+
+    async def _record_failure(self, job: dict, exc: Exception):
+        now = datetime.utcnow()
+        attempts = job.get("attempts", 1)
+        if is_permanent(exc) or attempts >= OUTBOX_MAX_ATTEMPTS:
+            update = {"status": DEAD, "failed_at": now, "last_error": str(exc)}
+            logger.error("Email dead-lettered", extra={**_job_fields(job), "attempts": attempts, "error": str(exc)})
+        else:
+            update = {"status": PENDING, "next_attempt_at": now + _backoff(attempts), "last_error": str(exc)}
+            logger.warning("Email send failed, will retry", extra={**_job_fields(job), "attempts": attempts, "error": str(exc)})
+        await db.email_outbox.update_one(
+            {"_id": job["_id"], "locked_by": self.worker_id},
+            {"$set": update, "$unset": {"locked_by": "", "locked_until": ""}},
+        )
+
+
+dispatcher = OutboxDispatcher()
+
+async def outbox_status(failed_limit: int = 50) -> dict:
+    """Queue depth per state plus the most recent dead-lettered jobs."""
+    counts = {PENDING: 0, SENDING: 0, SENT: 0, DEAD: 0}
+    async for row in db.email_outbox.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+
+    failed = []
+    cursor = db.email_outbox.find(
+        {"status": DEAD},
+        {"subject": 1, "recipient": 1, "attempts": 1, "last_error": 1, "created_at": 1, "failed_at": 1},
+    ).sort("failed_at", -1).limit(failed_limit)
+    async for job in cursor:
+        failed.append({
+            "id": str(job["_id"]),
+            "subject": job.get("subject"),
+            "recipient": job.get("recipient"),
+            "attempts": job.get("attempts"),
+            "last_error": job.get("last_error"),
+            "created_at": job.get("created_at").isoformat() if job.get("created_at") else None,
+            "failed_at": job.get("failed_at").isoformat() if job.get("failed_at") else None,
+        })
+    return {"counts": counts, "failed": failed}
@@ -0,0 +1,236 @@
+# app/ratelimit.py
+import os
+import json
+import logging
+import math
+import time
+from typing import Optional
+
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse
+
+from .cache import TTLCache
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Settings
+# ------------------------
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")               # memory | mongo
+RATE_LIMIT_CACHE_SIZE = int(os.getenv("RATE_LIMIT_CACHE_SIZE", "20000"))
+RATE_LIMIT_MAX_BODY = int(os.getenv("RATE_LIMIT_MAX_BODY", "65536"))         # bytes buffered to read the email
+# X-Forwarded-For entries appended by our own proxies (Render adds one); 0 = use the socket peer
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+
+# path -> {"ip" | "email": (capacity, seconds)}
+# A bucket holds `capacity` tokens and refills completely over `seconds`; every request takes one.
+DEFAULT_RULES = {
+    "/login":          {"ip": (20, 60), "email": (10, 300)},
+    "/signup":         {"ip": (5, 60),  "email": (3, 3600)},
+    "/contact":        {"ip": (5, 60),  "email": (3, 600)},
+    "/audit":          {"ip": (5, 60),  "email": (3, 600)},
+    "/newsletter":     {"ip": (5, 60),  "email": (2, 3600)},
+    "/book-meeting":   {"ip": (5, 60),  "email": (3, 600)},
+    "/choose-package": {"ip": (5, 60),  "email": (3, 600)},
+}
+
+INDEXES = {
+    # TTL: a bucket is dropped once it would have refilled completely anyway
+    "rate_limits": [IndexModel([("expires_at", 1)], expireAfterSeconds=0)],
+}
+
+def load_rules() -> dict:
+    """DEFAULT_RULES, with per-route overrides from RATE_LIMIT_RULES (JSON, same shape; null disables)."""
+    rules = {path: dict(limits) for path, limits in DEFAULT_RULES.items()}
+    overrides = json.loads(os.getenv("RATE_LIMIT_RULES") or "{}")
+    for path, limits in overrides.items():
+        if limits is None:
+            rules.pop(path, None)
+        else:
+            rules.setdefault(path, {}).update({kind: tuple(v) for kind, v in limits.items()})
+    return rules
+
+
+class MemoryBucketStore:
+    """Token buckets for this process only; bounded LRU so a flood of distinct keys stays flat."""
+
+    def __init__(self, maxsize: int = RATE_LIMIT_CACHE_SIZE):
+        self._buckets = TTLCache(maxsize=maxsize, ttl=3600)
+
+    async def take(self, key: str, capacity: int, seconds: float) -> tuple[bool, float]:
+        """Take one token. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        rate = capacity / seconds
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets.set(key, (tokens, now), ttl=seconds)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class MongoBucketStore:
+    """
+    Token buckets shared by all gunicorn workers.
+
+    Refill and take happen in a single pipeline update on the server clock
+    ($$NOW), so concurrent requests from any worker see a consistent bucket.
+    One round trip per checked bucket.
+    """
+
+    async def take(self, key: str, capacity: int, seconds: float) -> tuple[bool, float]:
+        rate_ms = capacity / (seconds * 1000)
+        pipeline = [
+            {"$set": {"tokens": {"$min": [capacity, {"$add": [
+                {"$ifNull": ["$tokens", capacity]},
+                {"$multiply": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, rate_ms]},
+            ]}]}}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "updated_at": "$$NOW",
+                "expires_at": {"$add": ["$$NOW", int(seconds * 1000)]},
+            }},
+        ]
+        for _ in range(2):
+            try:
+                doc = await db.rate_limits.find_one_and_update(
+                    {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                # two workers upserted the same new bucket; the retry updates the winner's document
+                continue
+        else:
+            return True, 0.0
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / (rate_ms * 1000)
+
+
+def _build_store():
+    if RATE_LIMIT_BACKEND == "mongo":
+        return MongoBucketStore()
+    return MemoryBucketStore()
+
+
+def client_ip(scope) -> str:
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                hops = [h.strip() for h in value.decode("latin-1").split(",") if h.strip()]
+                if hops:
+                    # entries before the ones our proxies appended are client-controlled
+                    return hops[max(0, len(hops) - RATE_LIMIT_PROXY_HOPS)]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _extract_email(body: bytes) -> Optional[str]:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying token-bucket limits to the public POST endpoints.
+
+    The per-IP bucket is checked from the headers alone, before any of the body
+    is read. Routes with an email rule then buffer the body (at most
+    RATE_LIMIT_MAX_BODY bytes), check the per-email bucket and replay the
+    buffered body to the app, so rejected requests never reach validation,
+    Mongo, bcrypt or SMTP. Store errors fail open.
+    """
+
+    def __init__(self, app, rules: Optional[dict] = None, store=None):
+        self.app = app
+        self.rules = load_rules() if rules is None else rules
+        self.store = store or _build_store()
+
+    async def __call__(self, scope, receive, send):
+        if not RATE_LIMIT_ENABLED or scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+        path = scope["path"].rstrip("/") or "/"
+        rule = self.rules.get(path)
+        if not rule:
+            return await self.app(scope, receive, send)
+
+        if "ip" in rule:
+            allowed, retry_after = await self._take(f"{path}|ip|{client_ip(scope)}", rule["ip"])
+            if not allowed:
+                return await self._reject(scope, receive, send, retry_after)
+
+        if "email" in rule:
+            declared = dict(scope.get("headers", [])).get(b"content-length")
+            if declared and declared.isdigit() and int(declared) > RATE_LIMIT_MAX_BODY:
+                return await self._too_large(scope, receive, send)
+            body = await read_body(receive, RATE_LIMIT_MAX_BODY)
+            if body is None:
+                return await self._too_large(scope, receive, send)
+            receive = replay_body(body, receive)
+            email = _extract_email(body)
+            if email:
+                allowed, retry_after = await self._take(f"{path}|email|{email}", rule["email"])
+                if not allowed:
+                    return await self._reject(scope, receive, send, retry_after)
+
+        await self.app(scope, receive, send)
+
+    async def _take(self, key: str, limit: tuple) -> tuple[bool, float]:
+        capacity, seconds = limit
+        try:
+            return await self.store.take(key, capacity, seconds)
+        except Exception as e:
+            logger.warning("Rate limiter unavailable, allowing request", extra={"error": str(e)})
+            return True, 0.0
+
+    @staticmethod
+    async def _reject(scope, receive, send, retry_after: float):
+        response = JSONResponse(
+            {"detail": "Too many requests. Please try again later."},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _too_large(scope, receive, send):
+        await JSONResponse({"detail": "Request body too large"}, status_code=413)(scope, receive, send)
+
+
+async def read_body(receive, limit: int) -> Optional[bytes]:
+    """Buffer the whole request body; None if it exceeds `limit` bytes."""
+    chunks, size, more = [], 0, True
+    while more:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        more = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+def replay_body(body: bytes, receive):
+    """A receive() that hands the app a body already read by middleware."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
@@ -0,0 +1,218 @@
+# app/smtp_async.py
+import asyncio
+import time
+from typing import Optional
+
+try:
+    import aiosmtplib
+except ImportError:   # optional: without it MAIL_TRANSPORT=async falls back to the thread transport
+    aiosmtplib = None
+
+# Errors after which a session is considered broken and must be replaced
+# (aiosmtplib's disconnect/connect errors are ConnectionErrors, its timeouts TimeoutErrors).
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError, OSError)
+
+
+def available() -> bool:
+    return aiosmtplib is not None
+
+
+def permanent_failure(exc: Exception) -> bool:
+    """aiosmtplib counterpart of the outbox's smtplib check: 5xx replies will not succeed on retry."""
+    if aiosmtplib is None:
+        return False
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return 500 <= exc.code < 600
+    return False
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+
+
+class AsyncSMTPPool:
+    """
+    SMTPPool for the event loop: the same pooled, authenticated sessions, driven
+    by aiosmtplib instead of blocking smtplib calls on threads.
+
+    A send waiting for the server costs a coroutine, not an OS thread, so hundreds
+    of queued sends only wait on the `size` slots. Idle sessions are reused for
+    up to `idle_timeout`, and a send that fails on a dead session is retried once
+    on a fresh connection, as in app/smtp_pool.py.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        size: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: float = 20.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._idle: list[_Session] = []
+        self._slots = asyncio.Semaphore(size)
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+
+    # ------------------------
+    # Connection lifecycle
+    # ------------------------
+    async def _connect(self) -> _Session:
+        # start_tls=False: STARTTLS is done explicitly below, like the smtplib pool
+        smtp = aiosmtplib.SMTP(hostname=self.host, port=self.port, timeout=self.timeout, start_tls=False)
+        await smtp.connect()
+        try:
+            await smtp.ehlo()
+            if self.starttls:
+                await smtp.starttls()
+                await smtp.ehlo()
+            if self.username and self.password:
+                await smtp.login(self.username, self.password)
+        except Exception:
+            await self._quit(smtp)
+            raise
+        return _Session(smtp)
+
+    @staticmethod
+    async def _quit(smtp):
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _acquire(self) -> _Session:
+        await self._slots.acquire()
+        try:
+            now = time.monotonic()
+            session = None
+            while self._idle:
+                # most recently used first: it is the least likely to have been dropped
+                candidate = self._idle.pop()
+                if now - candidate.last_used < self.idle_timeout:
+                    session = candidate
+                    break
+                await self._quit(candidate.smtp)
+            return session or await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _release(self, session: Optional[_Session]):
+        try:
+            if session is not None:
+                session.last_used = time.monotonic()
+                if self._closed:
+                    await self._quit(session.smtp)
+                else:
+                    self._idle.append(session)
+                    self._ensure_reaper()
+        finally:
+            self._slots.release()
+
+    def _ensure_reaper(self):
+        # not a supervised background task: it lives as long as the pool has idle
+        # sessions, and close() stops it
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop(), name="smtp-pool-reaper")
+
+    async def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while not self._closed and self._idle:
+            await asyncio.sleep(interval)
+            await self.close_idle()
+
+    async def close_idle(self):
+        """Close sessions that have been idle longer than `idle_timeout`."""
+        now = time.monotonic()
+        stale = [s for s in self._idle if now - s.last_used >= self.idle_timeout]
+        self._idle = [s for s in self._idle if now - s.last_used < self.idle_timeout]
+        for session in stale:
+            await self._quit(session.smtp)
+
+    async def close(self):
+        """Close every idle session; sessions in use are closed when released."""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        idle, self._idle = self._idle, []
+        for session in idle:
+            await self._quit(session.smtp)
+
+    # ------------------------
+    # Sending
+    # ------------------------
+    async def _discard(self, session: _Session):
+        session.smtp.close()
+        await self._release(None)
+
+    async def _recycle(self, session: _Session):
+        try:
+            await session.smtp.rset()
+        except Exception:
+            await self._discard(session)
+            return
+        await self._release(session)
+
+    async def send_message(self, msg):
+        """Send an EmailMessage over a pooled session. Raises on failure."""
+        return await self._send(lambda smtp: smtp.send_message(msg))
+
+    async def sendmail(self, from_addr: str, to_addrs: list, data: bytes) -> dict:
+        """
+        Send pre-built message bytes (see app/mime.py) to every address in `to_addrs`
+        in one SMTP transaction. Returns the refused recipients; raises
+        SMTPRecipientsRefused only if all of them were refused.
+        """
+        errors, _ = await self._send(lambda smtp: smtp.sendmail(from_addr, to_addrs, data))
+        return errors
+
+    async def _send(self, operation):
+        """
+        Await `operation(smtp)` on a pooled session.
+        Retries once on a fresh connection if the pooled session turns out to be dead
+        (disconnects, socket errors, or a 421 "closing channel" reply). Raises on failure.
+        """
+        for attempt in (1, 2):
+            session = await self._acquire()
+            try:
+                result = await operation(session.smtp)
+            except _CONNECTION_ERRORS:
+                await self._discard(session)
+                if attempt == 2:
+                    raise
+                continue
+            except aiosmtplib.SMTPResponseException as exc:
+                if exc.code != 421:
+                    # the server rejected this message, the session itself is fine
+                    await self._recycle(session)
+                    raise
+                await self._discard(session)
+                if attempt == 2:
+                    raise
+                continue
+            except aiosmtplib.SMTPRecipientsRefused:
+                await self._recycle(session)
+                raise
+            except BaseException:
+                # includes cancellation mid-conversation: the session state is unknown
+                await self._discard(session)
+                raise
+            await self._release(session)
+            return result
@@ -0,0 +1,208 @@
+# app/smtp_pool.py
+import smtplib
+import threading
+import time
+from typing import Optional
+
+# Errors after which a session is considered broken and must be replaced.
+# smtplib.SMTPException subclasses OSError, so server replies must be handled before these.
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError, OSError)
+
+
+class _Session:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Small pool of authenticated SMTP sessions shared by the sending threads.
+
+    Connecting to SendGrid costs a TCP connect, EHLO, STARTTLS, EHLO and AUTH;
+    a pooled session pays that once and then only runs MAIL/RCPT/DATA per message.
+    Sessions idle longer than `idle_timeout` are closed (providers drop them anyway),
+    and a send that fails on a dead session is retried once on a fresh connection.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        size: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: float = 20.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._idle: list[_Session] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._reaper: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ------------------------
+    # Connection lifecycle
+    # ------------------------
+    def _connect(self) -> _Session:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._quit(smtp)
+            raise
+        return _Session(smtp)
+
+    @staticmethod
+    def _quit(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _acquire(self) -> _Session:
+        self._slots.acquire()
+        try:
+            now = time.monotonic()
+            session = None
+            stale = []
+            with self._lock:
+                while self._idle:
+                    # most recently used first: it is the least likely to have been dropped
+                    candidate = self._idle.pop()
+                    if now - candidate.last_used < self.idle_timeout:
+                        session = candidate
+                        break
+                    stale.append(candidate)
+            for old in stale:
+                self._quit(old.smtp)
+            return session or self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, session: Optional[_Session]):
+        try:
+            if session is not None:
+                session.last_used = time.monotonic()
+                with self._lock:
+                    if self._closed:
+                        self._quit(session.smtp)
+                    else:
+                        self._idle.append(session)
+                        self._ensure_reaper()
+        finally:
+            self._slots.release()
+
+    def _ensure_reaper(self):
+        # called with self._lock held
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_loop, name="smtp-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if self._closed:
+                    return
+                if not self._idle:
+                    self._reaper = None
+                    return
+            self.close_idle()
+
+    def close_idle(self):
+        """Close sessions that have been idle longer than `idle_timeout`."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [s for s in self._idle if now - s.last_used >= self.idle_timeout]
+            self._idle = [s for s in self._idle if now - s.last_used < self.idle_timeout]
+        for session in stale:
+            self._quit(session.smtp)
+
+    def close(self):
+        """Close every idle session; sessions in use are closed when released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._quit(session.smtp)
+
+    # ------------------------
+    # Sending
+    # ------------------------
+    def _discard(self, session: _Session):
+        self._quit(session.smtp)
+        self._release(None)
+
+    def _recycle(self, session: _Session):
+        try:
+            session.smtp.rset()
+        except Exception:
+            self._discard(session)
+            return
+        self._release(session)
+
+    def send_message(self, msg):
+        """Send an EmailMessage over a pooled session. Raises on failure."""
+        return self._send(lambda smtp: smtp.send_message(msg))
+
+    def sendmail(self, from_addr: str, to_addrs: list, data: bytes) -> dict:
+        """
+        Send pre-built message bytes (see app/mime.py) to every address in `to_addrs`
+        in one SMTP transaction. Returns the refused recipients, like smtplib; raises
+        SMTPRecipientsRefused only if all of them were refused.
+        """
+        return self._send(lambda smtp: smtp.sendmail(from_addr, to_addrs, data))
+
+    def _send(self, operation):
+        """
+        Run `operation(smtp)` on a pooled session.
+        Retries once on a fresh connection if the pooled session turns out to be dead
+        (disconnects, socket errors, or a 421 "closing channel" reply). Raises on failure.
+        """
+        for attempt in (1, 2):
+            session = self._acquire()
+            try:
+                result = operation(session.smtp)
+            except smtplib.SMTPRecipientsRefused:
+                self._recycle(session)
+                raise
+            except smtplib.SMTPResponseException as exc:
+                if exc.smtp_code != 421:
+                    # the server rejected this message, the session itself is fine
+                    self._recycle(session)
+                    raise
+                self._discard(session)
+                if attempt == 2:
+                    raise
+                continue
+            except _CONNECTION_ERRORS:
+                self._discard(session)
+                if attempt == 2:
+                    raise
+                continue
+            except Exception:
+                self._discard(session)
+                raise
+            self._release(session)
+            return result
@@ -0,0 +1,119 @@
+# app/stats.py
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import IndexModel
+
+from .cache import TTLCache
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+# Collections tracked on the admin dashboard
+STATS_COLLECTIONS = ("users", "meetings", "audits", "contacts", "newsletters", "packages")
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "5"))
+
+INDEXES = {
+    "stats_counters": [IndexModel([("day", 1)])],
+}
+
+_stats_cache = TTLCache(maxsize=64, ttl=STATS_CACHE_TTL)
+
+def _day(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+def _counter_key(package: str) -> str:
+    # package names become field names; keep them out of Mongo's path syntax
+    return package.replace(".", "_").lstrip("$") or "_"
+
+async def record_submission(collection: str, package: Optional[str] = None, at: Optional[datetime] = None):
+    """
+    Bump the per-day counter document for a form insert ({_id: "<collection>:<day>"}).
+    Counters only ever go up: they count submissions, not surviving documents.
+    Never raises; a missed bump must not fail the submission.
+    """
+    day = _day(at or datetime.utcnow())
+    inc = {"count": 1}
+    if package:
+        inc[f"packages.{_counter_key(package)}"] = 1
+    try:
+        await db.stats_counters.update_one(
+            {"_id": f"{collection}:{day}"},
+            {"$inc": inc, "$setOnInsert": {"collection": collection, "day": day}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.warning("Failed to record submission stats", extra={"collection": collection, "error": str(e)})
+
+async def _totals() -> dict:
+    # collection metadata counts: O(1), no scan
+    counts = await asyncio.gather(*(db[name].estimated_document_count() for name in STATS_COLLECTIONS))
+    return dict(zip(STATS_COLLECTIONS, counts))
+
+async def _from_counters(start_day: str) -> tuple[dict, dict]:
+    per_day = {name: [] for name in STATS_COLLECTIONS}
+    packages: dict[str, int] = {}
+    cursor = db.stats_counters.find({"day": {"$gte": start_day}}).sort("day", 1)
+    async for doc in cursor:
+        if doc.get("collection") not in per_day:
+            continue
+        per_day[doc["collection"]].append({"day": doc["day"], "count": doc.get("count", 0)})
+        for package, count in (doc.get("packages") or {}).items():
+            packages[package] = packages.get(package, 0) + count
+    return per_day, packages
+
+async def _per_day_pipeline(name: str, start: datetime) -> list:
+    pipeline = [
+        {"$match": {"created_at": {"$gte": start}}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return [{"day": row["_id"], "count": row["count"]} async for row in db[name].aggregate(pipeline)]
+
+async def _from_aggregation(start: datetime) -> tuple[dict, dict]:
+    series = await asyncio.gather(*(_per_day_pipeline(name, start) for name in STATS_COLLECTIONS))
+    per_day = dict(zip(STATS_COLLECTIONS, series))
+    pipeline = [
+        {"$match": {"created_at": {"$gte": start}}},
+        {"$group": {"_id": "$package", "count": {"$sum": 1}}},
+    ]
+    packages = {str(row["_id"]): row["count"] async for row in db.packages.aggregate(pipeline)}
+    return per_day, packages
+
+async def dashboard_stats(days: int = 30, source: str = "counters") -> dict:
+    """
+    Dashboard summary: totals, submissions per day and package popularity over `days`.
+
+    source="counters" reads the small per-day counter documents (fast, counts
+    submissions since counters were introduced); source="aggregate" runs
+    aggregation pipelines over created_at (covers older data, scans the window).
+    Results are cached per worker for STATS_CACHE_TTL seconds.
+    """
+    key = (days, source)
+    cached = _stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    now = datetime.utcnow()
+    start = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if source == "aggregate":
+        (per_day, packages), totals = await asyncio.gather(_from_aggregation(start), _totals())
+    else:
+        (per_day, packages), totals = await asyncio.gather(_from_counters(_day(start)), _totals())
+
+    result = {
+        "days": days,
+        "source": source,
+        "generated_at": now.isoformat(),
+        "totals": totals,
+        "per_day": per_day,
+        "packages": sorted(
+            ({"package": name, "count": count} for name, count in packages.items()),
+            key=lambda p: p["count"], reverse=True,
+        ),
+    }
+    _stats_cache.set(key, result)
+    return result
@@ -0,0 +1,112 @@
+# app/tasks.py
+import os
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from .metrics import BACKGROUND_DURATION, BACKGROUND_INFLIGHT, BACKGROUND_TASKS, BACKGROUND_WAIT
+
+logger = logging.getLogger(__name__)
+
+# ------------------------
+# Settings
+# ------------------------
+BACKGROUND_CONCURRENCY = int(os.getenv("BACKGROUND_CONCURRENCY", "8"))    # tasks running at once
+BACKGROUND_MAX_PENDING = int(os.getenv("BACKGROUND_MAX_PENDING", "256"))  # queued + running before submit() waits
+BACKGROUND_THREADS = int(os.getenv("BACKGROUND_THREADS", "4"))            # blocking work (SMTP), see run_in_thread
+BACKGROUND_DRAIN_TIMEOUT = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT", "20"))
+
+
+class TaskSupervisor:
+    """
+    Owner of this worker's background work.
+
+    - keeps a reference to every task it starts (the event loop only holds weak ones)
+    - runs at most `concurrency` of them at a time
+    - applies backpressure: once `max_pending` are queued or running, submit() waits
+      for a slot, so a burst slows its callers down instead of piling up tasks
+    - has its own thread pool for blocking calls, separate from asyncio's default
+      executor (asyncio.to_thread), so slow SMTP cannot starve other to_thread users
+    - drains on shutdown: waits for outstanding tasks, then cancels the stragglers
+    """
+
+    def __init__(self, name: str = "background", concurrency: int = BACKGROUND_CONCURRENCY,
+                 max_pending: int = BACKGROUND_MAX_PENDING, threads: int = BACKGROUND_THREADS):
+        self.name = name
+        self.threads = threads
+        self._running = asyncio.Semaphore(concurrency)
+        self._slots = asyncio.Semaphore(max_pending)
+        self._tasks: set[asyncio.Task] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closing = False
+
+    def __len__(self):
+        return len(self._tasks)
+
+    async def submit(self, coro: Awaitable, name: str = "task") -> Optional[asyncio.Task]:
+        """Start `coro` in the background; waits (backpressure) while max_pending tasks are outstanding."""
+        if self._closing:
+            # shutting down: nothing may outlive the drain, so run it in the caller
+            await self._supervised(coro, name)
+            return None
+        started = time.perf_counter()
+        await self._slots.acquire()
+        BACKGROUND_WAIT.labels(self.name).observe(time.perf_counter() - started)
+        BACKGROUND_INFLIGHT.labels(self.name).inc()
+        task = asyncio.create_task(self._supervised(coro, name), name=f"{self.name}:{name}")
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._slots.release()
+        BACKGROUND_INFLIGHT.labels(self.name).dec()
+
+    async def _supervised(self, coro: Awaitable, name: str):
+        async with self._running:
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await coro
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            except Exception:
+                outcome = "error"
+                logger.exception("Background task failed", extra={"task": name})
+            finally:
+                BACKGROUND_DURATION.labels(self.name, name).observe(time.perf_counter() - started)
+                BACKGROUND_TASKS.labels(self.name, name, outcome).inc()
+
+    async def run_in_thread(self, func: Callable, *args):
+        """Run a blocking call on the supervisor's own thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix=self.name)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def drain(self, timeout: float = BACKGROUND_DRAIN_TIMEOUT):
+        """Stop accepting background tasks and wait for the outstanding ones; cancel what is left after `timeout`."""
+        self._closing = True
+        if not self._tasks:
+            return
+        pending = set(self._tasks)
+        logger.info("Draining background tasks", extra={"supervisor": self.name, "tasks": len(pending)})
+        done, still_running = await asyncio.wait(pending, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            await asyncio.gather(*still_running, return_exceptions=True)
+            logger.warning("Cancelled background tasks at shutdown", extra={"supervisor": self.name, "tasks": len(still_running)})
+
+    def close(self):
+        """Shut the thread pool down; call after everything using run_in_thread has stopped."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+background = TaskSupervisor()
@@ -118,26 +118,31 @@
 import os
 import asyncio
 import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from email.message import EmailMessage
 from dotenv import load_dotenv
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from jose import jwt
 
+from .database import db
+from .mime import MessageBuilder
+from .smtp_pool import SMTPPool
+from .smtp_async import AsyncSMTPPool, available as async_smtp_available
+from .metrics import timed, BCRYPT_DURATION, SMTP_SEND, SMTP_FAILURES
+from .tasks import background
+
+logger = logging.getLogger(__name__)
+
 # Load environment (local dev). Render will provide env vars in its dashboard.
 load_dotenv()
 
 # ------------------------
-# Database
+# Database (single client owned by app.database)
 # ------------------------
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-DB_NAME = os.getenv("DB_NAME", "sellharborx")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[DB_NAME]
-
 def get_collection(name: str):
     return db[name]
 
@@ -161,6 +166,46 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     pre = _pre_hash(plain_password)
     return pwd_context.verify(pre, hashed_password)
 
+# bcrypt is deliberately slow (hundreds of ms per call). Running it inline in an
+# async handler freezes the whole worker's event loop, so hashing goes through a
+# small dedicated pool. bcrypt releases the GIL, so threads are enough here.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "16"))
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+
+def _timed_hash(func, *args):
+    # measured on the pool thread: bcrypt time only, not time spent queued
+    with timed(BCRYPT_DURATION, "hash" if func is get_password_hash else "verify"):
+        return func(*args)
+
+async def _run_hashing(func, *args):
+    """
+    Run a bcrypt call on the hashing pool.
+    Fails fast with 503 when HASH_MAX_PENDING calls are already queued or running,
+    instead of letting a login burst build an unbounded backlog.
+    """
+    global _hash_pending
+    if _hash_pending >= HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, _timed_hash, func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -177,47 +222,108 @@ MAIL_USERNAME = os.getenv("MAIL_USERNAME", "apikey")   # must be 'apikey' for Se
 MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "")         # the SendGrid API Key
 MAIL_FROM = os.getenv("MAIL_FROM", MAIL_USERNAME)
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", MAIL_FROM)
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() in ("1", "true", "yes")
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", "4"))
+MAIL_IDLE_TIMEOUT = float(os.getenv("MAIL_IDLE_TIMEOUT", "60"))
+# "async": aiosmtplib on the event loop; "thread": smtplib on the background supervisor's threads
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "async").lower()
+if MAIL_TRANSPORT == "async" and not async_smtp_available():
+    logger.warning("MAIL_TRANSPORT=async needs aiosmtplib, falling back to threads")
+    MAIL_TRANSPORT = "thread"
+
+# Authenticated sessions are reused across messages instead of reconnecting per email.
+smtp_pool = SMTPPool(
+    MAIL_HOST,
+    MAIL_PORT,
+    username=MAIL_USERNAME,
+    password=MAIL_PASSWORD,
+    starttls=MAIL_STARTTLS,
+    size=MAIL_POOL_SIZE,
+    idle_timeout=MAIL_IDLE_TIMEOUT,
+)
+async_smtp_pool = AsyncSMTPPool(
+    MAIL_HOST,
+    MAIL_PORT,
+    username=MAIL_USERNAME,
+    password=MAIL_PASSWORD,
+    starttls=MAIL_STARTTLS,
+    size=MAIL_POOL_SIZE,
+    idle_timeout=MAIL_IDLE_TIMEOUT,
+)
+
+# Bodies are MIME-encoded once and reused across recipients (see app/mime.py).
+message_builder = MessageBuilder(MAIL_FROM)
+
+def mail_configured() -> bool:
+    return bool(MAIL_USERNAME and MAIL_PASSWORD)
+
+def deliver_email_sync(subject: str, html_content: str, recipient: str, text_fallback: Optional[str] = None):
+    """
+    Send one email over a pooled SMTP session. Raises on failure so callers
+    (e.g. the outbox dispatcher) can decide whether to retry. A comma-separated
+    `recipient` is delivered to every address in one transaction.
+    """
+    envelope = message_builder.build(subject, html_content, recipient, text_fallback)
+    try:
+        with timed(SMTP_SEND):
+            refused = smtp_pool.sendmail(*envelope)
+    except Exception as exc:
+        SMTP_FAILURES.labels(type(exc).__name__).inc()
+        raise
+    _log_refused(refused, subject)
+
+def _log_refused(refused: dict, subject: str):
+    # only some of several recipients were refused; the message still went to the rest
+    if refused:
+        logger.warning("Recipients refused", extra={"recipients": sorted(refused), "subject": subject})
+
+async def deliver_email(subject: str, html_content: str, recipient: str, text_fallback: Optional[str] = None):
+    """
+    Send one email with the configured MAIL_TRANSPORT. Raises on failure, like deliver_email_sync.
+    """
+    if MAIL_TRANSPORT != "async":
+        return await background.run_in_thread(deliver_email_sync, subject, html_content, recipient, text_fallback)
+    envelope = message_builder.build(subject, html_content, recipient, text_fallback)
+    try:
+        with timed(SMTP_SEND):
+            refused = await async_smtp_pool.sendmail(*envelope)
+    except Exception as exc:
+        SMTP_FAILURES.labels(type(exc).__name__).inc()
+        raise
+    _log_refused(refused, subject)
 
 def _send_email_sync(subject: str, html_content: str, recipient: str, text_fallback: Optional[str] = None):
     """
-    Synchronous sending using smtplib (TLS). Works for SendGrid SMTP (smtp.sendgrid.net:587).
-    Runs in a thread via asyncio.to_thread when called from async code.
+    Synchronous sending over a pooled SMTP session (SendGrid SMTP, smtp.sendgrid.net:587).
+    For scripts and other sync callers; async code uses send_email.
     """
-    if not MAIL_USERNAME or not MAIL_PASSWORD:
-        print("⚠️ Mail credentials not set. Skipping send.")
+    if not mail_configured():
+        logger.warning("Mail credentials not set, skipping send")
         return False
 
     try:
-        msg = EmailMessage()
-        msg["From"] = MAIL_FROM
-        msg["To"] = recipient
-        msg["Subject"] = subject
-
-        if text_fallback:
-            msg.set_content(text_fallback)
-        # HTML part
-        msg.add_alternative(html_content, subtype="html")
-
-        # Connect to SMTP
-        import smtplib
-        with smtplib.SMTP(MAIL_HOST, MAIL_PORT, timeout=20) as server:
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            server.login(MAIL_USERNAME, MAIL_PASSWORD)
-            server.send_message(msg)
-
-        print(f"✅ Email sent to {recipient} (subject: {subject})")
+        deliver_email_sync(subject, html_content, recipient, text_fallback)
+        logger.info("Email sent", extra={"recipient": recipient, "subject": subject, "sampled": True})
         return True
 
     except Exception as exc:
-        print(f"❌ Failed to send email to {recipient}: {exc}")
+        logger.error("Email send failed", extra={"recipient": recipient, "subject": subject, "error": str(exc)})
         return False
 
 async def send_email(subject: str, html_content: str, recipient: str, text_fallback: Optional[str] = None):
     """
-    Async wrapper - schedule synchronous send in a thread.
+    Send with the configured transport (see deliver_email).
     Returns True/False for success.
     """
-    return await asyncio.to_thread(_send_email_sync, subject, html_content, recipient, text_fallback)
+    if not mail_configured():
+        logger.warning("Mail credentials not set, skipping send")
+        return False
 
+    try:
+        await deliver_email(subject, html_content, recipient, text_fallback)
+        logger.info("Email sent", extra={"recipient": recipient, "subject": subject, "sampled": True})
+        return True
+
+    except Exception as exc:
+        logger.error("Email send failed", extra={"recipient": recipient, "subject": subject, "error": str(exc)})
+        return False
@@ -0,0 +1,58 @@
+# benchmarks/duplicate_race.py
+"""
+Fire identical submissions concurrently and count how many were accepted.
+
+With the unique indexes every form should accept exactly one copy:
+
+    python -m benchmarks.duplicate_race --base-url http://127.0.0.1:8000 --copies 50
+"""
+import argparse
+import asyncio
+import uuid
+
+import httpx
+
+
+def payloads(tag):
+    email = f"race-{tag}@example.com"
+    return {
+        "/newsletter": {"email": email},
+        "/book-meeting": {"name": "Race", "email": email, "agenda": "race", "date": "2030-01-01"},
+        "/choose-package": {
+            "package": "Pro", "price": "$1", "name": "Race", "email": email,
+            "company": "Race Co", "url": "https://example.com", "businessType": "brand",
+        },
+        "/audit": {
+            "firstname": "Race", "lastname": "Test", "email": email, "brandname": "Race",
+            "producturl": "https://example.com/dp/RACE", "message": "race",
+        },
+        "/signup": {"username": "race", "email": email, "password": "race-password"},
+    }
+
+
+async def race(client, path, body, copies):
+    responses = await asyncio.gather(*(client.post(path, json=body) for _ in range(copies)))
+    accepted = sum(
+        1 for r in responses
+        if r.status_code in (200, 201) and not r.json().get("alreadyExists")
+    )
+    conflicts = sum(1 for r in responses if r.status_code == 409 or (r.status_code == 200 and r.json().get("alreadyExists")))
+    return accepted, conflicts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--copies", type=int, default=50)
+    args = parser.parse_args()
+
+    tag = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        for path, body in payloads(tag).items():
+            accepted, conflicts = await race(client, path, body, args.copies)
+            duplicates = max(accepted - 1, 0)
+            print(f"{path:<16} accepted={accepted:<3} conflicts={conflicts:<4} duplicates={duplicates}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
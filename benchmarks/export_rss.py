@@ -0,0 +1,79 @@
+# benchmarks/export_rss.py
+"""
+Stream a large audits export and track peak RSS.
+
+Needs a local mongod. Seeds synthetic audits into a separate database
+(default `sellharborx_bench`) and runs the export generator in-process:
+
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.export_rss --docs 1000000 --format csv
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_NAME", "sellharborx_bench")
+
+from app.database import db, mongo  # noqa: E402
+from app.forms.admin import ADMIN_COLLECTIONS, export_chunks  # noqa: E402
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+
+
+async def seed(total):
+    existing = await db.audits.estimated_document_count()
+    if existing >= total:
+        print(f"reusing {existing} seeded audits")
+        return
+    await db.audits.drop()
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    for n in range(total):
+        batch.append({
+            "firstname": f"First{n}",
+            "lastname": f"Last{n}",
+            "email": f"user{n}@example.com",
+            "brandname": f"Brand {n % 5000}",
+            "producturl": f"https://www.amazon.com/dp/B{n:09d}",
+            "message": "Please review my listing, conversion dropped after the last update.",
+            "created_at": start + timedelta(seconds=n * 30),
+        })
+        if len(batch) == 10_000:
+            await db.audits.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.audits.insert_many(batch, ordered=False)
+    print(f"seeded {total} audits")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    args = parser.parse_args()
+
+    mongo.connect()
+    await seed(args.docs)
+
+    name, projection, serialize = ADMIN_COLLECTIONS["audits"]
+    baseline = peak = rss_mb()
+    total_bytes = rows = 0
+    started = time.perf_counter()
+    async for chunk in export_chunks(db[name], {}, projection, serialize, args.format):
+        total_bytes += len(chunk)
+        rows += chunk.count(b"\n")
+        peak = max(peak, rss_mb())
+    elapsed = time.perf_counter() - started
+
+    print(f"exported {rows} lines / {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"RSS baseline {baseline:.1f} MB, peak {peak:.1f} MB (+{peak - baseline:.1f} MB)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+# benchmarks/list_serialization.py
+"""
+CPU cost of serializing a large admin list page: the old dict + jsonable_encoder +
+JSONResponse path vs the typed Page[...] models rendered with model_dump_json.
+
+No database needed; documents are generated in memory:
+
+    python -m benchmarks.list_serialization --rows 10000 --repeat 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.codec import page_response
+from app.forms.admin import PackageOut
+
+
+def make_docs(rows):
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Customer {n}",
+            "email": f"customer{n}@example.com",
+            "package": ("Starter", "Pro", "Enterprise")[n % 3],
+            "price": "$499",
+            "company": f"Company {n}",
+            "url": f"https://example.com/{n}",
+            "businessType": "brand",
+            "notes": "Looking to scale on Amazon & Walmart" if n % 2 else None,
+            "created_at": start + timedelta(seconds=n),
+        }
+        for n in range(rows)
+    ]
+
+
+def old_path(docs):
+    # what the endpoint did before: hand-built dicts, isoformat per document,
+    # then FastAPI's jsonable_encoder walk and json.dumps in JSONResponse
+    items = [
+        {
+            "id": str(p.get("_id")),
+            "name": p.get("name"),
+            "email": p.get("email"),
+            "package": p.get("package"),
+            "price": p.get("price"),
+            "company": p.get("company"),
+            "url": p.get("url"),
+            "businessType": p.get("businessType"),
+            "notes": p.get("notes"),
+            "created_at": p["created_at"].isoformat() if p.get("created_at") else None,
+        }
+        for p in docs
+    ]
+    return JSONResponse(jsonable_encoder({"items": items, "next_cursor": None})).body
+
+
+def new_path(docs):
+    return page_response(PackageOut, docs, None).body
+
+
+def measure(label, func, docs, repeat):
+    func(docs)   # warm-up (builds the cached TypeAdapter)
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        body = func(docs)
+    cpu = (time.process_time() - cpu_started) / repeat * 1000
+    wall = (time.perf_counter() - wall_started) / repeat * 1000
+    print(f"{label:<28} cpu={cpu:8.2f}ms wall={wall:8.2f}ms body={len(body) / 1024:8.1f}KB")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    docs = make_docs(args.rows)
+    old = measure("dicts + jsonable_encoder", old_path, docs, args.repeat)
+    new = measure("Page[PackageOut] dump_json", new_path, docs, args.repeat)
+    print(f"CPU saved per {args.rows}-row response: {old - new:.2f}ms ({(1 - new / old) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/login_attempts_memory.py
+"""
+Record failed logins for many distinct emails and watch RSS stay flat.
+
+    python -m benchmarks.login_attempts_memory --emails 1000000
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.login_attempts_memory --backend mongo --emails 200000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DB_NAME", "sellharborx_bench")
+
+from app.database import mongo  # noqa: E402
+from app.login_attempts import MemoryAttemptStore, MongoAttemptStore  # noqa: E402
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--emails", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.backend == "mongo":
+        mongo.connect()
+        store = MongoAttemptStore()
+    else:
+        store = MemoryAttemptStore()
+
+    started = time.perf_counter()
+    baseline = rss_mb()
+    checkpoint = max(args.emails // 10, 1)
+    for n in range(args.emails):
+        await store.hit(f"user{n}@example.com")
+        if (n + 1) % checkpoint == 0:
+            print(f"{n + 1:>9} emails  rss={rss_mb():7.1f} MB")
+    elapsed = time.perf_counter() - started
+    print(f"baseline {baseline:.1f} MB, final {rss_mb():.1f} MB, {args.emails / elapsed:,.0f} hits/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
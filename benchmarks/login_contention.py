@@ -0,0 +1,90 @@
+# benchmarks/login_contention.py
+"""
+Measure /contact latency while bcrypt-heavy logins hit the same server.
+
+Run the API first (e.g. `uvicorn app.main:app --port 8000`), then:
+
+    python -m benchmarks.login_contention --base-url http://127.0.0.1:8000
+
+Reports p50/p95/p99 for /contact with no login traffic and with
+--login-concurrency parallel login loops.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-password-123"
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def contact_loop(client, stop_at, samples):
+    n = 0
+    while time.perf_counter() < stop_at:
+        n += 1
+        started = time.perf_counter()
+        await client.post("/contact", json={
+            "firstname": "Bench",
+            "email": f"bench-contact-{n}@example.com",
+            "subject": "benchmark",
+            "message": "latency probe",
+        })
+        samples.append((time.perf_counter() - started) * 1000)
+
+
+async def login_loop(client, stop_at):
+    while time.perf_counter() < stop_at:
+        # correct password: every request pays for one full bcrypt verify
+        await client.post("/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+
+
+async def run_phase(base_url, seconds, contact_concurrency, login_concurrency):
+    samples = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        stop_at = time.perf_counter() + seconds
+        tasks = [contact_loop(client, stop_at, samples) for _ in range(contact_concurrency)]
+        tasks += [login_loop(client, stop_at) for _ in range(login_concurrency)]
+        await asyncio.gather(*tasks)
+    return samples
+
+
+def report(label, samples):
+    print(
+        f"{label:<22} n={len(samples):<6} "
+        f"p50={percentile(samples, 50):8.1f}ms "
+        f"p95={percentile(samples, 95):8.1f}ms "
+        f"p99={percentile(samples, 99):8.1f}ms "
+        f"mean={statistics.fmean(samples) if samples else 0:8.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--contact-concurrency", type=int, default=4)
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        await client.post("/signup", json={"username": "bench", "email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+
+    report("contact (idle)", await run_phase(args.base_url, args.seconds, args.contact_concurrency, 0))
+    report(
+        f"contact (+{args.login_concurrency} logins)",
+        await run_phase(args.base_url, args.seconds, args.contact_concurrency, args.login_concurrency),
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
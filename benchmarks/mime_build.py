@@ -0,0 +1,68 @@
+# benchmarks/mime_build.py
+"""
+CPU and bytes per message for the newsletter confirmation: an EmailMessage built
+per recipient (set_content + add_alternative every time) vs app/mime.py, which
+encodes the body once and only formats the envelope headers per recipient.
+
+Also shows what one multi-recipient transaction saves over one message per address
+for an admin notification sent to --admins addresses. No SMTP server needed:
+
+    python -m benchmarks.mime_build --messages 5000 --admins 3
+"""
+import argparse
+import time
+from email.message import EmailMessage
+from email.policy import SMTP
+
+from app.email_templates import render
+from app.mime import MessageBuilder
+
+SENDER = "SellHarborX <hello@sellharborx.com>"
+SUBJECT = "SellHarborX — Newsletter subscription confirmed"
+
+
+def per_recipient(html, text, recipient):
+    # what build_email_message did for every send
+    msg = EmailMessage()
+    msg["From"] = SENDER
+    msg["To"] = recipient
+    msg["Subject"] = SUBJECT
+    msg.set_content(text)
+    msg.add_alternative(html, subtype="html")
+    return msg.as_bytes(policy=SMTP)
+
+
+def measure(label, build, messages):
+    started = time.process_time()
+    size = 0
+    for n in range(messages):
+        size += len(build(f"user{n}@example.com"))
+    cpu = (time.process_time() - started) / messages * 1e6
+    print(f"{label:<24} cpu={cpu:8.1f}us/msg  bytes={size / messages:8.0f}/msg")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--admins", type=int, default=3)
+    args = parser.parse_args()
+
+    html, text = render("newsletter_user")
+    builder = MessageBuilder(SENDER)
+
+    old = measure("EmailMessage per send", lambda rcpt: per_recipient(html, text, rcpt), args.messages)
+    new = measure("MessageBuilder", lambda rcpt: builder.build(SUBJECT, html, rcpt, text).data, args.messages)
+    print(f"CPU saved per message: {old - new:.1f}us ({(1 - new / old) * 100:.0f}%)")
+
+    admins = [f"admin{n}@sellharborx.com" for n in range(args.admins)]
+    separate = sum(len(builder.build(SUBJECT, html, rcpt, text).data) for rcpt in admins)
+    shared = builder.build(SUBJECT, html, ", ".join(admins), text)
+    print(
+        f"{args.admins} admin addresses: {separate} bytes in {args.admins} transactions"
+        f" vs {len(shared.data)} bytes in 1 transaction ({len(shared.recipients)} RCPT)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/smtp_throughput.py
+"""
+Messages per second: connect-per-message smtplib vs the pooled SMTP transport.
+
+Starts a local aiosmtpd sink (no TLS, no auth) so only connection handling is measured:
+
+    python -m benchmarks.smtp_throughput --messages 2000 --threads 8
+"""
+import argparse
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+from aiosmtpd.controller import Controller
+
+from app.smtp_pool import SMTPPool
+
+
+class _Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def build_message(n):
+    msg = EmailMessage()
+    msg["From"] = "bench@example.com"
+    msg["To"] = f"user{n}@example.com"
+    msg["Subject"] = "benchmark"
+    msg.set_content("plain text body")
+    msg.add_alternative("<html><body><p>html body</p></body></html>", subtype="html")
+    return msg
+
+
+def send_connect_per_message(host, port, msg):
+    # what _send_email_sync used to do for every email (minus STARTTLS/AUTH)
+    with smtplib.SMTP(host, port, timeout=20) as server:
+        server.ehlo()
+        server.send_message(msg)
+
+
+def run(label, send, messages, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, (build_message(n) for n in range(messages))))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {messages} msgs in {elapsed:6.2f}s -> {messages / elapsed:8.1f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    sink = _Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        run("connect per message", lambda msg: send_connect_per_message("127.0.0.1", args.port, msg), args.messages, args.threads)
+        pool = SMTPPool("127.0.0.1", args.port, starttls=False, size=args.pool_size)
+        try:
+            run(f"pooled (size={args.pool_size})", pool.send_message, args.messages, args.threads)
+        finally:
+            pool.close()
+    finally:
+        controller.stop()
+    print(f"sink received {sink.received} messages")
+
+
+if __name__ == "__main__":
+    main()
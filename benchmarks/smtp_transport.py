@@ -0,0 +1,123 @@
+# benchmarks/smtp_transport.py
+"""
+Thread transport (smtplib pool on a thread pool) vs async transport (aiosmtplib pool
+on the event loop) with many sends in flight at once.
+
+Starts a local aiosmtpd sink that answers DATA after --latency seconds, standing in for
+a slow provider. Reports throughput plus the peak thread count and RSS growth per run:
+
+    python -m benchmarks.smtp_transport --messages 2000 --concurrency 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiosmtpd.controller import Controller
+
+from app.smtp_async import AsyncSMTPPool
+from app.smtp_pool import SMTPPool
+from benchmarks.smtp_throughput import build_message
+
+
+class _SlowSink:
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return "250 OK"
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+async def sample(stop, peaks):
+    while not stop.is_set():
+        peaks["threads"] = max(peaks["threads"], threading.active_count())
+        peaks["rss"] = max(peaks["rss"], rss_kb())
+        await asyncio.sleep(0.01)
+
+
+async def run(label, send_all, messages):
+    stop = asyncio.Event()
+    baseline = rss_kb()
+    peaks = {"threads": threading.active_count(), "rss": baseline}
+    sampler = asyncio.create_task(sample(stop, peaks))
+    started = time.perf_counter()
+    await send_all()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    print(
+        f"{label:<26} {messages} msgs in {elapsed:6.2f}s -> {messages / elapsed:8.1f} msg/s"
+        f"  peak threads={peaks['threads']:4d}  rss +{(peaks['rss'] - baseline) / 1024:6.1f}MB"
+    )
+
+
+async def main_async(args):
+    messages = [build_message(n) for n in range(args.messages)]
+
+    # thread transport: what send_email did with MAIL_TRANSPORT=thread, one thread per in-flight send
+    pool = SMTPPool("127.0.0.1", args.port, starttls=False, size=args.pool_size)
+    executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="smtp")
+    loop = asyncio.get_running_loop()
+
+    async def thread_send_all():
+        await asyncio.gather(*(loop.run_in_executor(executor, pool.send_message, msg) for msg in messages))
+
+    try:
+        await run(f"thread (pool={args.pool_size})", thread_send_all, args.messages)
+    finally:
+        executor.shutdown(wait=True)
+        pool.close()
+
+    # async transport: the same number of sends in flight, as coroutines
+    async_pool = AsyncSMTPPool("127.0.0.1", args.port, starttls=False, size=args.pool_size)
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def send(msg):
+        async with gate:
+            await async_pool.send_message(msg)
+
+    async def async_send_all():
+        await asyncio.gather(*(send(msg) for msg in messages))
+
+    try:
+        await run(f"async (pool={args.pool_size})", async_send_all, args.messages)
+    finally:
+        await async_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="sends in flight at once")
+    parser.add_argument("--pool-size", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the sink takes to accept DATA")
+    parser.add_argument("--port", type=int, default=8026)
+    args = parser.parse_args()
+
+    sink = _SlowSink(args.latency)
+    controller = Controller(sink, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        controller.stop()
+    print(f"sink received {sink.received} messages")
+
+
+if __name__ == "__main__":
+    main()
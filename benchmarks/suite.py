@@ -0,0 +1,338 @@
+# benchmarks/suite.py
+"""
+Load-test every public endpoint, /login and the admin lists at increasing concurrency.
+
+By default the app runs in-process (httpx ASGITransport, real lifespan) against a
+local mongod and a local aiosmtpd sink, so outbox delivery is exercised too:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --mongo mongomock            # no mongod needed (mongomock-motor)
+    python -m benchmarks.suite --base-url http://127.0.0.1:8000 --admin-password ...
+    python -m benchmarks.suite --compare baseline.json --output current.json
+
+Each (scenario, concurrency) level runs for --seconds with N closed-loop clients and
+reports throughput plus p50/p95/p99 latency. Results are written as JSON (with the
+git commit) so two runs can be diffed with --compare.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+BENCH_DB = "sellharborx_bench"
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-admin-password"
+USER_PASSWORD = "bench-password-123"
+ADMIN_LISTS = ("users", "meetings", "audits", "contacts", "newsletters", "packages")
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# ------------------------
+# Request payloads (unique per call so duplicate checks never short-circuit)
+# ------------------------
+_seq = itertools.count()
+_run = uuid.uuid4().hex[:8]
+
+
+def _email():
+    return f"bench-{_run}-{next(_seq)}@example.com"
+
+
+def form_request(path):
+    email = _email()
+    bodies = {
+        "/contact": {"firstname": "Bench", "email": email, "subject": "benchmark", "message": "load test"},
+        "/audit": {
+            "firstname": "Bench", "lastname": "Mark", "email": email, "brandname": "Bench",
+            "producturl": f"https://example.com/dp/{email}", "message": "load test",
+        },
+        "/newsletter": {"email": email},
+        "/book-meeting": {"name": "Bench", "email": email, "agenda": "load test", "date": "2030-01-01"},
+        "/choose-package": {
+            "package": "Pro", "price": "$1", "name": "Bench", "email": email,
+            "company": "Bench Co", "url": "https://example.com", "businessType": "brand",
+        },
+        "/signup": {"username": "bench", "email": email, "password": USER_PASSWORD},
+    }
+    return "POST", path, {"json": bodies[path]}
+
+
+# ------------------------
+# Scenarios: name -> list of (request label, request factory)
+# ------------------------
+def build_scenarios(ctx):
+    login = lambda: ("POST", "/login", {"json": {"email": ctx["user_email"], "password": USER_PASSWORD}})
+    auth = {"Authorization": f"Bearer {ctx['admin_token']}"}
+    scenarios = {
+        f"form {path}": [(path, lambda path=path: form_request(path))]
+        for path in ("/contact", "/audit", "/newsletter", "/book-meeting", "/choose-package", "/signup")
+    }
+    scenarios["login"] = [("/login", login)]
+    for name in ADMIN_LISTS:
+        scenarios[f"admin /admin/{name}"] = [
+            (f"/admin/{name}", lambda name=name: ("GET", f"/admin/{name}", {"params": {"limit": 50}, "headers": auth})),
+        ]
+    # bcrypt-heavy logins and cheap form posts sharing the same workers: latencies are
+    # reported per request type, so contact p99 shows how much the logins hurt it
+    scenarios["mixed login+contact"] = [("/login", login), ("/contact", lambda: form_request("/contact"))]
+    scenarios["mixed login+forms"] = [("/login", login)] + [
+        (path, lambda path=path: form_request(path)) for path in ("/contact", "/newsletter", "/audit")
+    ]
+    return scenarios
+
+
+async def _client_loop(client, factories, stop_at, samples, statuses, offset):
+    # each client cycles through the scenario's request types, starting at its own offset
+    for label, factory in itertools.islice(itertools.cycle(factories), offset, None):
+        if time.perf_counter() >= stop_at:
+            return
+        method, path, kwargs = factory()
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except Exception as exc:
+            status = type(exc).__name__
+        samples.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+        statuses.setdefault(label, Counter())[str(status)] += 1
+
+
+def _summary(scenario, concurrency, label, samples, statuses, elapsed):
+    errors = sum(n for status, n in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "request": label,
+        "requests": len(samples),
+        "errors": errors,
+        "status_counts": dict(statuses),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+        "mean_ms": round(statistics.fmean(samples), 2) if samples else 0.0,
+        "max_ms": round(max(samples), 2) if samples else 0.0,
+    }
+
+
+async def run_level(client, scenario, factories, concurrency, seconds):
+    samples, statuses = {}, {}
+    started = time.perf_counter()
+    stop_at = started + seconds
+    await asyncio.gather(*(
+        _client_loop(client, factories, stop_at, samples, statuses, i % len(factories))
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    return [
+        _summary(scenario, concurrency, label, samples[label], statuses[label], elapsed)
+        for label in samples
+    ]
+
+
+# ------------------------
+# Setup
+# ------------------------
+async def prepare(client):
+    """Create the login user and an admin token."""
+    user_email = _email()
+    response = await client.post("/signup", json={"username": "bench", "email": user_email, "password": USER_PASSWORD})
+    response.raise_for_status()
+    response = await client.post("/admin/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    response.raise_for_status()
+    return {"user_email": user_email, "admin_token": response.json()["access_token"]}
+
+
+def configure_in_process(args, smtp_port):
+    # read by the app modules at import time, so set before importing app.main
+    os.environ.update({
+        "DB_NAME": args.db_name,
+        "ADMIN_USERNAME": ADMIN_USERNAME,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "MAIL_HOST": "127.0.0.1",
+        "MAIL_PORT": str(smtp_port),
+        "MAIL_STARTTLS": "false",
+        "MAIL_USERNAME": "bench",
+        "MAIL_PASSWORD": "bench",
+        "RATE_LIMIT_ENABLED": "false",   # the limiter would turn every level into 429s
+    })
+    if args.mongodb_uri:
+        os.environ["MONGODB_URI"] = args.mongodb_uri
+
+
+class _Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def _accept_any_login(server, session, envelope, mechanism, auth_data):
+    from aiosmtpd.smtp import AuthResult
+    return AuthResult(success=True)
+
+
+async def run_suite(args, client):
+    ctx = await prepare(client)
+    scenarios = build_scenarios(ctx)
+    selected = [name for name in scenarios if not args.only or any(word in name for word in args.only)]
+    results = []
+    for name in selected:
+        for concurrency in args.concurrency:
+            rows = await run_level(client, name, scenarios[name], concurrency, args.seconds)
+            for row in rows:
+                print(
+                    f"{name:<26} c={concurrency:<4} {row['request']:<16} n={row['requests']:<6} "
+                    f"rps={row['throughput_rps']:8.1f} p50={row['p50_ms']:8.1f} p95={row['p95_ms']:8.1f} "
+                    f"p99={row['p99_ms']:8.1f}ms errors={row['errors']}",
+                    file=sys.stderr,
+                )
+            results.extend(rows)
+    return results
+
+
+async def run_in_process(args):
+    import httpx
+    from aiosmtpd.controller import Controller
+
+    sink = _Sink()
+    # the app's SMTP pool always logs in, so the sink accepts any credentials over plain text
+    controller = Controller(
+        sink, hostname="127.0.0.1", port=args.smtp_port,
+        authenticator=_accept_any_login, auth_require_tls=False,
+    )
+    controller.start()
+    configure_in_process(args, args.smtp_port)
+    try:
+        from app.main import app
+        from app.database import mongo, DB_NAME
+
+        if args.mongo == "mongomock":
+            from mongomock_motor import AsyncMongoMockClient
+            # MongoConnection.connect() is a no-op once a client is set
+            mongo.client = AsyncMongoMockClient()
+            mongo.db = mongo.client[DB_NAME]
+        else:
+            # start from an empty database; the lifespan recreates indexes and the admin
+            from motor.motor_asyncio import AsyncIOMotorClient
+            scratch = AsyncIOMotorClient(args.mongodb_uri)
+            await scratch.drop_database(DB_NAME)
+            scratch.close()
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                results = await run_suite(args, client)
+        return results, {"smtp_messages_received": sink.received}
+    finally:
+        controller.stop()
+
+
+async def run_remote(args):
+    import httpx
+
+    global ADMIN_USERNAME, ADMIN_PASSWORD
+    ADMIN_USERNAME = args.admin_username or ADMIN_USERNAME
+    ADMIN_PASSWORD = args.admin_password or ADMIN_PASSWORD
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        return await run_suite(args, client), {}
+
+
+# ------------------------
+# Reporting
+# ------------------------
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, results, threshold):
+    """Print p95/throughput changes against a previous results file; returns True if anything regressed."""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"], r["request"]): r for r in json.load(f)["results"]}
+    regressed = False
+    for row in results:
+        old = baseline.get((row["scenario"], row["concurrency"], row["request"]))
+        if not old or not old["p95_ms"] or not old["throughput_rps"]:
+            continue
+        p95 = row["p95_ms"] / old["p95_ms"] - 1
+        rps = row["throughput_rps"] / old["throughput_rps"] - 1
+        flag = p95 > threshold or rps < -threshold
+        regressed |= flag
+        print(
+            f"{'REGRESSION ' if flag else '           '}{row['scenario']:<26} c={row['concurrency']:<4} "
+            f"{row['request']:<16} p95 {p95:+7.1%}  rps {rps:+7.1%}",
+            file=sys.stderr,
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--admin-username", help="admin credentials for --base-url runs")
+    parser.add_argument("--admin-password")
+    parser.add_argument("--mongo", choices=("mongod", "mongomock"), default="mongod")
+    parser.add_argument("--mongodb-uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=BENCH_DB, help="dropped and recreated for in-process mongod runs")
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--only", nargs="*", help="run scenarios whose name contains any of these words")
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    if args.base_url:
+        results, extra = asyncio.run(run_remote(args))
+    else:
+        results, extra = asyncio.run(run_in_process(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or f"in-process ({args.mongo})",
+            "seconds_per_level": args.seconds,
+            "concurrency": args.concurrency,
+            **extra,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare and compare(args.compare, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/template_render.py
+"""
+Render cost per submission: inline f-strings vs the compiled template registry.
+
+    python -m benchmarks.template_render --iterations 20000
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.email_templates import load_templates, render
+
+PAYLOAD = {
+    "package": "Growth",
+    "price": "$499",
+    "name": "Jane Seller",
+    "email": "jane@example.com",
+    "company": "Jane's Widgets",
+    "url": "https://www.amazon.com/dp/B000000000",
+    "businessType": "Private label",
+    "notes": "Looking to scale PPC",
+}
+
+
+def fstring_package(p, now):
+    # the previous inline approach (admin notification only, trimmed to its dynamic parts' shape)
+    html = f"""
+    <html>
+      <body style="font-family:'Poppins',Arial,sans-serif;background-color:#f8f9fa;padding:20px;color:#111;">
+        <div style="max-width:650px;margin:auto;background:white;border-radius:10px;overflow:hidden;box-shadow:0 2px 12px rgba(0,0,0,0.1);">
+          <div style="background:#111;padding:20px;text-align:center;">
+            <h2 style="color:#2ecc71;margin:0;">New Package Request</h2>
+          </div>
+          <div style="padding:25px;">
+            <p><b>New package form submission received.</b></p>
+            <ul style="line-height:1.7;font-size:15px;color:#333;">
+              <li><b>Name:</b> {p['name']}</li>
+              <li><b>Email:</b> {p['email']}</li>
+              <li><b>Product:</b> {p['company']}</li>
+              <li><b>Package:</b> {p['package']}</li>
+              <li><b>Price:</b> {p['price']}</li>
+              <li><b>Business Type:</b> {p['businessType']}</li>
+              <li><b>URL:</b> <a href="{p['url']}" style="color:#2ecc71;">{p['url']}</a></li>
+              <li><b>Notes:</b> {p['notes'] or '—'}</li>
+              <li><b>Submitted At (UTC):</b> {now.strftime('%Y-%m-%d %H:%M:%S')}</li>
+            </ul>
+          </div>
+        </div>
+      </body>
+    </html>
+    """
+    text = (
+        f"New package submission:\n"
+        f"- Package: {p['package']}\n"
+        f"- Name: {p['name']}\n"
+        f"- Email: {p['email']}\n"
+    )
+    return html, text
+
+
+def bench(label, fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<34} {per_call:8.2f} µs/render")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    load_templates()
+    now = datetime.utcnow()
+    bench("f-string (no escaping)", lambda: fstring_package(PAYLOAD, now), args.iterations)
+    bench("template package_admin (escaped)", lambda: render("package_admin", **PAYLOAD, now=now), args.iterations)
+    bench("template newsletter_user (memoized)", lambda: render("newsletter_user"), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
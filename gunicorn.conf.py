@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+import os
+import shutil
+import tempfile
+
+# prometheus_client multiprocess mode: each worker writes its samples to files in
+# this directory and /metrics merges them. Must be set before the workers import
+# the app, so it lives here in the master.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "sellharborx-prometheus")
+)
+
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+
+def on_starting(server):
+    # samples from a previous run would be merged into the new one
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.forms.admin import _csv_safe
+
+
+@pytest.mark.parametrize("value", [
+    "=HYPERLINK(\"http://evil.test\")",
+    "+1+1",
+    "-1+1",
+    "@SUM(A1:A2)",
+    "\t=1+1",
+    "\r=1+1",
+])
+def test_formula_prefixes_are_escaped(value):
+    assert _csv_safe(value) == "'" + value
+
+
+@pytest.mark.parametrize("value", ["Acme Inc", "", "a=b", None, 42])
+def test_other_values_are_unchanged(value):
+    assert _csv_safe(value) == value
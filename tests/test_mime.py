@@ -0,0 +1,41 @@
+import pytest
+
+from app.mime import MessageBuilder
+
+
+@pytest.fixture
+def builder():
+    return MessageBuilder("SellHarborX <hello@sellharborx.com>")
+
+
+@pytest.mark.parametrize("subject", [
+    "Hello\r\nBcc: victim@evil.test",
+    "Hello\nBcc: victim@evil.test",
+    "Hello\rBcc: victim@evil.test",
+    "Héllo\r\nBcc: victim@evil.test",
+])
+def test_subject_with_line_break_is_rejected(builder, subject):
+    with pytest.raises(ValueError):
+        builder.build(subject, "<p>hi</p>", "user@example.com")
+
+
+def test_recipient_with_line_break_is_rejected(builder):
+    with pytest.raises(ValueError):
+        builder.build("Hello", "<p>hi</p>", "user@example.com\r\nBcc: victim@evil.test")
+
+
+def test_message_headers(builder):
+    envelope = builder.build("Hello", "<p>hi</p>", "a@example.com, b@example.com", "hi")
+    headers = envelope.data.split(b"\r\n\r\n", 1)[0]
+
+    assert envelope.sender == "hello@sellharborx.com"
+    assert envelope.recipients == ["a@example.com", "b@example.com"]
+    assert b"\r\nSubject: Hello\r\n" in headers
+    assert b"Bcc" not in headers
+    assert b"@sellharborx.com>" in headers.split(b"Message-ID: ", 1)[1]
+
+
+def test_message_id_domain_without_at_sign():
+    builder = MessageBuilder("apikey")
+    envelope = builder.build("Hello", "<p>hi</p>", "user@example.com")
+    assert b"@localhost>" in envelope.data.split(b"Message-ID: ", 1)[1]
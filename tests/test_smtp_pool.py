@@ -0,0 +1,81 @@
+import smtplib
+
+import pytest
+
+from app.smtp_pool import SMTPPool, _Session
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP: `replies` are raised (or returned) by successive sendmail calls."""
+
+    def __init__(self, replies):
+        self.replies = replies   # shared by every connection of a test
+        self.sendmail_calls = 0
+        self.rset_calls = 0
+        self.closed = False
+
+    def sendmail(self, from_addr, to_addrs, data):
+        self.sendmail_calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def rset(self):
+        self.rset_calls += 1
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    pool = SMTPPool("localhost", 25, starttls=False, size=1)
+    pool.connects = []
+
+    def connect():
+        smtp = FakeSMTP(pool.replies)
+        pool.connects.append(smtp)
+        return _Session(smtp)
+
+    pool._connect = connect
+    yield pool
+    pool.close()
+
+
+def test_rejected_message_is_raised_once_and_session_is_pooled(pool):
+    pool.replies = [smtplib.SMTPDataError(550, b"rejected")]
+
+    with pytest.raises(smtplib.SMTPDataError):
+        pool.sendmail("from@example.com", ["to@example.com"], b"data")
+
+    assert len(pool.connects) == 1
+    smtp = pool.connects[0]
+    assert smtp.sendmail_calls == 1
+    assert smtp.rset_calls == 1
+    assert not smtp.closed
+    assert [s.smtp for s in pool._idle] == [smtp]
+
+
+def test_refused_recipients_keep_the_session(pool):
+    pool.replies = [smtplib.SMTPRecipientsRefused({"to@example.com": (550, b"no such user")})]
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.sendmail("from@example.com", ["to@example.com"], b"data")
+
+    assert len(pool.connects) == 1
+    assert pool.connects[0].sendmail_calls == 1
+    assert len(pool._idle) == 1
+
+
+def test_dead_session_is_retried_on_a_new_connection(pool):
+    pool.replies = [smtplib.SMTPServerDisconnected("gone"), {}]
+
+    assert pool.sendmail("from@example.com", ["to@example.com"], b"data") == {}
+
+    assert len(pool.connects) == 2
+    assert pool.connects[0].closed
+    assert [s.smtp for s in pool._idle] == [pool.connects[1]]